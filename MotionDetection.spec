@@ -1,13 +1,26 @@
 # -*- mode: python ; coding: utf-8 -*-
-from PyInstaller.utils.hooks import collect_all
+# cv2 and PIL are picked up through their PyInstaller hooks instead of collect_all,
+# which copied every submodule, plugin and data file into the bundle.
 
 datas = []
 binaries = []
 hiddenimports = []
-tmp_ret = collect_all('cv2')
-datas += tmp_ret[0]; binaries += tmp_ret[1]; hiddenimports += tmp_ret[2]
-tmp_ret = collect_all('PIL')
-datas += tmp_ret[0]; binaries += tmp_ret[1]; hiddenimports += tmp_ret[2]
+
+# Not used by the app; some are reachable only through optional imports
+excludes = [
+    'matplotlib',
+    'scipy',
+    'pandas',
+    'IPython',
+    'PyQt5',
+    'PyQt6',
+    'PySide2',
+    'PySide6',
+    'PIL.ImageQt',
+    'PIL.ImageShow',
+    'numpy.f2py',
+    'numpy.distutils',
+]
 
 
 a = Analysis(
@@ -19,7 +32,7 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=excludes,
     noarchive=False,
     optimize=0,
 )
@@ -0,0 +1,112 @@
+"""
+Batch processor memory benchmark.
+
+Runs processVideo on a video in a fresh child process (once with prefetch, once without)
+and prints wall time, peak RSS, the peak of memory traced by tracemalloc, and how many
+distinct frame arrays the loop allocated per frame: every array coming out of the source
+or going into the highlight writer that is a new object (not a buffer seen before and
+still alive) counts as one frame allocation.
+
+    python scripts/bench_batch_memory.py input_4k.mp4
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+
+_CHILD = r"""
+import json, resource, sys, time, tracemalloc, weakref
+from pathlib import Path
+sys.path.insert(0, sys.argv[1])
+from config import AppConfig
+import processor
+
+seen = {}  # id -> weakref; ndarrays are not hashable
+counts = {"allocs": 0, "frames": 0}
+
+def _count(frame):
+    if frame is None:
+        return
+    ref = seen.get(id(frame))
+    if ref is None or ref() is not frame:
+        key = id(frame)
+        seen[key] = weakref.ref(frame, lambda _r, key=key: seen.pop(key, None))
+        counts["allocs"] += 1
+
+def _wrapSource(openSource):
+    def wrapped(*a, **kw):
+        src = openSource(*a, **kw)
+        read = src.read
+        def countingRead(image=None):
+            ok, frame = read(image=image)
+            if ok:
+                counts["frames"] += 1
+                _count(frame)
+            return ok, frame
+        src.read = countingRead
+        return src
+    return wrapped
+
+class _CountingWriter:
+    def __init__(self, inner):
+        self.inner = inner
+    def write(self, frame):
+        _count(frame)
+        self.inner.write(frame)
+    def release(self):
+        self.inner.release()
+
+_makeWriter = processor.makeWriter
+processor.openSource = _wrapSource(processor.openSource)
+processor.makeWriter = lambda *a, **kw: _CountingWriter(_makeWriter(*a, **kw))
+
+cfg = AppConfig()
+cfg.output_dir = Path(sys.argv[3])
+cfg.prefetch_frames = int(sys.argv[4])
+tracemalloc.start()
+t0 = time.perf_counter()
+processor.processVideo(Path(sys.argv[2]), cfg)
+elapsed = time.perf_counter() - t0
+print(json.dumps({
+    "seconds": elapsed,
+    "frames": counts["frames"],
+    "allocs": counts["allocs"],
+    "maxrss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "traced_peak": tracemalloc.get_traced_memory()[1],
+}))
+"""
+
+
+def _run(video: Path, prefetch: int) -> dict:
+    with tempfile.TemporaryDirectory() as out:
+        proc = subprocess.run(
+            [sys.executable, "-c", _CHILD, str(SRC), str(video), out, str(prefetch)],
+            capture_output=True, text=True, check=True,
+        )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Batch processor memory benchmark.")
+    parser.add_argument("video", type=Path)
+    args = parser.parse_args(argv)
+
+    print(f"{'prefetch':>8} {'frames':>6} {'fps':>7} {'peak RSS MB':>11} {'traced peak MB':>14} {'frame allocs':>12} {'per frame':>9}")
+    for prefetch in (8, 0):
+        r = _run(args.video, prefetch)
+        frames = max(1, r["frames"])
+        print(
+            f"{prefetch:>8} {r['frames']:>6} {r['frames'] / r['seconds']:7.1f} {r['maxrss_kb'] / 1024:11.1f} "
+            f"{r['traced_peak'] / 2**20:14.1f} {r['allocs']:>12} {r['allocs'] / frames:9.2f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,116 @@
+"""
+Frame fan-out benchmark.
+
+One capture process publishes frames into a shared-memory FrameRing; 1..N consumer
+processes (detector, recorder, display) read them without copying. For each consumer
+count, prints per-consumer throughput and capture-to-done latency.
+
+    python scripts/bench_frame_bus.py --max-consumers 4 --seconds 5
+    python scripts/bench_frame_bus.py --source recording.mp4
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import cv2  # noqa: E402
+import numpy as np  # noqa: E402
+
+from frame_bus import FrameBus, FrameRing, RingReader  # noqa: E402
+from live_feed import LiveFeedConfig  # noqa: E402
+from live_motion import LiveMotionConfig, LiveMotionDetector  # noqa: E402
+
+CONSUMER_KINDS = ("detect", "record", "display")
+
+
+def _makeSampleVideo(path: Path, width: int, height: int, frames: int, fps: float):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    for i in range(frames):
+        frame = np.full((height, width, 3), 60, np.uint8)
+        x = (i * 7) % (width - 120)
+        cv2.rectangle(frame, (x, height // 3), (x + 120, height // 3 + 200), (255, 255, 255), -1)
+        writer.write(frame)
+    writer.release()
+
+
+def consumerMain(spec, stopEvent, kind: str, results):
+    ring = FrameRing.attach(spec)
+    reader = RingReader(ring, policy="oldest" if kind == "record" else "latest")
+    detector = LiveMotionDetector(LiveMotionConfig())
+    latencies = []
+    doneAt = []
+    torn = 0
+    try:
+        while not stopEvent.is_set():
+            item = reader.next(timeoutS=0.2)
+            if item is None:
+                continue
+            seq, frame, ts = item
+            if kind == "detect":
+                detector.update(frame)
+            elif kind == "record":
+                cv2.imencode(".jpg", frame)
+            else:
+                cv2.resize(frame, (640, 360), interpolation=cv2.INTER_AREA)
+            if not ring.isCurrent(seq):
+                torn += 1  # writer lapped us mid-frame
+            now = time.monotonic()
+            latencies.append(now - ts)
+            doneAt.append(now)
+    finally:
+        del detector
+        ring.close()
+        # fps over this consumer's own active span (process start-up is not counted)
+        fps = (len(doneAt) - 1) / (doneAt[-1] - doneAt[0]) if len(doneAt) > 1 else 0.0
+        results.put((kind, fps, latencies, reader.missed, torn))
+
+
+def runOnce(source: str, consumers: int, seconds: float, fps: float, slots: int):
+    bus = FrameBus(LiveFeedConfig(source=source, prefetch_frames=4), slots=slots, paceFps=fps)
+    bus.start()
+    results = bus.ctx.Queue()
+    for i in range(consumers):
+        kind = CONSUMER_KINDS[i % len(CONSUMER_KINDS)]
+        bus.addConsumer(consumerMain, kind, results, name=f"{kind}-{i}")
+    time.sleep(seconds)
+    bus.stop()
+
+    rows = []
+    for _ in range(consumers):
+        kind, fps, lat, missed, torn = results.get(timeout=10)
+        lat = np.array(lat) * 1000.0 if lat else np.zeros(1)
+        rows.append((kind, fps, float(np.mean(lat)), float(np.percentile(lat, 95)), missed, torn))
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Shared-memory frame fan-out benchmark.")
+    parser.add_argument("--source", help="video file (default: generated 1280x720 clip)")
+    parser.add_argument("--max-consumers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--fps", type=float, default=30.0, help="capture pace")
+    parser.add_argument("--slots", type=int, default=8)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = args.source
+        if not source:
+            source = str(Path(tmp) / "bench.mp4")
+            frames = int(args.fps * (args.seconds + 5))
+            _makeSampleVideo(Path(source), 1280, 720, frames, args.fps)
+
+        print(f"source={source} | pace={args.fps:.0f} fps | slots={args.slots} | {args.seconds:.0f}s per run")
+        print(f"{'consumers':>9}  {'consumer':<8} {'fps':>6} {'lat avg ms':>10} {'lat p95 ms':>10} {'missed':>7} {'torn':>5}")
+        for n in range(1, args.max_consumers + 1):
+            for kind, fps, avg, p95, missed, torn in runOnce(source, n, args.seconds, args.fps, args.slots):
+                print(f"{n:>9}  {kind:<8} {fps:6.1f} {avg:10.2f} {p95:10.2f} {missed:7d} {torn:5d}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,97 @@
+"""
+ROI speedup benchmark.
+
+Times batch detectMotion and LiveMotionDetector on synthetic frames with centred
+rectangular ROIs covering different shares of the frame, plus one polygon ROI with an
+exclusion zone (which also pays for the mask), and prints the speedup against full-frame.
+
+    python scripts/bench_roi.py --width 1920 --height 1080
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import cv2  # noqa: E402
+import numpy as np  # noqa: E402
+
+from live_motion import LiveMotionConfig, LiveMotionDetector  # noqa: E402
+from motion import detectMotion  # noqa: E402
+from roi import RegionConfig, resolveRegion  # noqa: E402
+
+
+def _frames(width: int, height: int, count: int):
+    rng = np.random.default_rng(0)
+    base = rng.integers(40, 80, (height, width, 3), dtype=np.uint8)
+    out = []
+    for i in range(count):
+        f = base.copy()
+        x = (i * 17) % (width - 200)
+        cv2.rectangle(f, (x, height // 3), (x + 200, height // 3 + 300), (255, 255, 255), -1)
+        out.append(f)
+    return out
+
+
+def _centredRegion(width: int, height: int, share: float) -> RegionConfig:
+    s = share ** 0.5
+    w, h = int(width * s), int(height * s)
+    x0, y0 = (width - w) // 2, (height - h) // 2
+    return RegionConfig(roi=[[(x0, y0), (x0 + w - 1, y0), (x0 + w - 1, y0 + h - 1), (x0, y0 + h - 1)]])
+
+
+def _polygonRegion(width: int, height: int) -> RegionConfig:
+    # Doorway-like trapezoid with a small excluded patch
+    roi = [(width // 4, height // 5), (width // 2, height // 5), (width * 3 // 5, height - 1), (width // 5, height - 1)]
+    exclude = [(width // 3, height // 2), (width // 3 + 60, height // 2), (width // 3 + 60, height // 2 + 60), (width // 3, height // 2 + 60)]
+    return RegionConfig(roi=[roi], exclude=[exclude])
+
+
+def _timeBatch(frames, region) -> float:
+    t0 = time.perf_counter()
+    for prev, curr in zip(frames, frames[1:]):
+        detectMotion(prev, curr, 25, 800, 5, 1, 2, region=region)
+    return 1000.0 * (time.perf_counter() - t0) / (len(frames) - 1)
+
+
+def _timeLive(frames, region) -> float:
+    det = LiveMotionDetector(LiveMotionConfig(warmup_frames=0), region=region)
+    det.update(frames[0])
+    t0 = time.perf_counter()
+    for f in frames[1:]:
+        det.update(f)
+    return 1000.0 * (time.perf_counter() - t0) / (len(frames) - 1)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="ROI speedup benchmark.")
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--frames", type=int, default=60)
+    args = parser.parse_args(argv)
+
+    frames = _frames(args.width, args.height, args.frames)
+    cases = [("full frame", None)]
+    for share in (0.5, 0.25, 0.1):
+        cases.append((f"rect {share:.0%}", _centredRegion(args.width, args.height, share)))
+    cases.append(("polygon+exclude", _polygonRegion(args.width, args.height)))
+
+    print(f"{args.width}x{args.height}, {args.frames} frames")
+    print(f"{'case':<16} {'roi share':>9} {'batch ms':>9} {'speedup':>8} {'live ms':>8} {'speedup':>8}")
+    baseBatch = baseLive = None
+    for name, region in cases:
+        rm = resolveRegion(region, args.width, args.height) if region else None
+        share = rm.areaFraction if rm is not None else 1.0
+        batchMs = _timeBatch(frames, rm)
+        liveMs = _timeLive(frames, region)
+        if baseBatch is None:
+            baseBatch, baseLive = batchMs, liveMs
+        print(f"{name:<16} {share:9.0%} {batchMs:9.2f} {baseBatch / batchMs:7.2f}x {liveMs:8.2f} {baseLive / liveMs:7.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
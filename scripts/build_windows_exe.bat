@@ -13,8 +13,11 @@ pyinstaller ^
   --name MotionDetection ^
   --noconfirm ^
   --clean ^
-  --collect-all cv2 ^
-  --collect-all PIL ^
+  --exclude-module matplotlib ^
+  --exclude-module scipy ^
+  --exclude-module pandas ^
+  --exclude-module PIL.ImageQt ^
+  --exclude-module numpy.f2py ^
   src\\main.py
 
 endlocal
@@ -0,0 +1,120 @@
+"""
+Startup-time budget check.
+
+Runs the app's startup path in a fresh interpreter under `python -X importtime`
+and fails (exit 1) when it goes over budget, or when a heavy module that should
+only load on first Run / Live Feed is imported before the window appears.
+
+    python scripts/check_startup_time.py --budget-ms 400
+
+With a display the time-to-window (import + SmartCamGUI() + first update) is
+measured; without one only the import of `gui` is timed.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+# Must not be imported before the user clicks Run / Live Feed / Review Events: the heavy
+# libraries and every src module that imports them, directly or through another module
+LAZY_MODULES = (
+    "cv2", "numpy", "PIL",
+    "processor", "live_feed_window", "event_review", "event_index", "replay", "sweep", "headless",
+    "activity", "clip_recorder", "frame_bus", "live_feed", "live_motion", "motion", "roi",
+    "video_source", "video_io",
+)
+
+_PROBE = """
+import sys, time
+t0 = time.perf_counter()
+import gui
+window = {window}
+if window:
+    app = gui.SmartCamGUI()
+    app.update()
+elapsed = time.perf_counter() - t0
+print("ELAPSED_MS", elapsed * 1000.0)
+print("LOADED", ",".join(m for m in {lazy!r} if m in sys.modules))
+if window:
+    app.destroy()
+"""
+
+
+def _hasDisplay() -> bool:
+    if sys.platform in ("darwin", "win32"):
+        return True
+    return bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+
+
+def _topImports(stderr: str, count: int):
+    # -X importtime lines: "import time: self [us] | cumulative | imported package"
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        name = parts[2]
+        if name.startswith("    "):
+            continue  # deeper than a direct import of a top-level module
+        rows.append((int(parts[1]), name.strip()))
+    rows.sort(reverse=True)
+    return rows[:count]
+
+
+def measure(window: bool):
+    code = _PROBE.format(window=window, lazy=LAZY_MODULES)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=str(SRC_DIR),
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "probe failed")
+
+    elapsedMs = 0.0
+    loaded = []
+    for line in proc.stdout.splitlines():
+        if line.startswith("ELAPSED_MS"):
+            elapsedMs = float(line.split()[1])
+        elif line.startswith("LOADED"):
+            loaded = [m for m in line.split(" ", 1)[1].split(",") if m]
+    return elapsedMs, loaded, _topImports(proc.stderr, 8)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Fail when time-to-window exceeds the startup budget.")
+    parser.add_argument("--budget-ms", type=float, default=400.0, help="maximum allowed startup time")
+    parser.add_argument("--runs", type=int, default=3, help="best of N runs (filters disk-cache noise)")
+    parser.add_argument("--no-window", action="store_true", help="only time `import gui`")
+    args = parser.parse_args(argv)
+
+    window = _hasDisplay() and not args.no_window
+    results = [measure(window) for _ in range(max(1, args.runs))]
+    elapsedMs, loaded, top = min(results, key=lambda r: r[0])
+
+    label = "time-to-window" if window else "import gui"
+    print(f"{label}: {elapsedMs:.1f} ms (budget {args.budget_ms:.0f} ms, best of {len(results)})")
+    print("slowest imports (top level and their direct imports):")
+    for cumulativeUs, name in top:
+        print(f"  {cumulativeUs / 1000.0:8.1f} ms  {name}")
+
+    failed = False
+    if loaded:
+        print(f"FAIL: imported before first use: {', '.join(loaded)}")
+        failed = True
+    if elapsedMs > args.budget_ms:
+        print(f"FAIL: {label} over budget by {elapsedMs - args.budget_ms:.1f} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
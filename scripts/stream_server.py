@@ -0,0 +1,139 @@
+"""
+Stand-in camera stream for trying out stream reconnects locally.
+
+Serves a video file (looped) or a moving test pattern as MJPEG over HTTP. --drop-after
+cuts every client off after that many seconds and --down-for then refuses connections
+for a while, so StreamSource's reconnect and exponential backoff can be watched in the log.
+
+    python scripts/stream_server.py --port 8090 --drop-after 10 --down-for 6
+    python src/headless.py --source http://127.0.0.1:8090/stream.mjpg
+"""
+from __future__ import annotations
+
+import argparse
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+import cv2
+import numpy as np
+
+BOUNDARY = "frame"
+
+
+class FrameSource:
+
+    # Loops a video file, or draws a moving rectangle when there is none. Shared by all clients.
+
+    def __init__(self, path: Optional[str], width: int, height: int):
+        self.path = path
+        self.width = width
+        self.height = height
+        self.lock = threading.Lock()
+        self.cap = cv2.VideoCapture(path) if path else None
+        if self.cap is not None and not self.cap.isOpened():
+            raise RuntimeError(f"Could not open video: {path}")
+        self.index = 0
+
+    def nextJpeg(self) -> bytes:
+        with self.lock:
+            if self.cap is not None:
+                ok, frame = self.cap.read()
+                if not ok:
+                    self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    ok, frame = self.cap.read()
+            else:
+                frame = np.full((self.height, self.width, 3), 60, np.uint8)
+                x = (self.index * 6) % max(1, self.width - 80)
+                cv2.rectangle(frame, (x, self.height // 3), (x + 80, self.height // 3 + 120), (255, 255, 255), -1)
+            self.index += 1
+        ok, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
+        return jpeg.tobytes()
+
+
+def makeHandler(frames: FrameSource, fps: float, dropAfterS: float, downForS: float):
+    state = {"downUntil": 0.0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            with lock:
+                down = time.monotonic() < state["downUntil"]
+            if down:
+                # Refuse like a camera that is still rebooting
+                print(f"{time.strftime('%H:%M:%S')} refused client {self.client_address[1]} (down)", flush=True)
+                self.close_connection = True
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={BOUNDARY}")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            print(f"{time.strftime('%H:%M:%S')} client {self.client_address[1]} connected", flush=True)
+
+            period = 1.0 / max(1.0, fps)
+            started = nextAt = time.monotonic()
+            sent = 0
+            try:
+                while True:
+                    if dropAfterS > 0 and time.monotonic() - started >= dropAfterS:
+                        with lock:
+                            state["downUntil"] = time.monotonic() + downForS
+                        print(
+                            f"{time.strftime('%H:%M:%S')} dropping client {self.client_address[1]} after {sent} frames"
+                            + (f"; down for {downForS:.0f}s" if downForS > 0 else ""),
+                            flush=True,
+                        )
+                        break
+                    jpeg = frames.nextJpeg()
+                    self.wfile.write(
+                        f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(jpeg)}\r\n\r\n".encode()
+                    )
+                    self.wfile.write(jpeg)
+                    self.wfile.write(b"\r\n")
+                    sent += 1
+                    nextAt += period
+                    delay = nextAt - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+            except (BrokenPipeError, ConnectionResetError):
+                print(f"{time.strftime('%H:%M:%S')} client {self.client_address[1]} went away after {sent} frames", flush=True)
+            self.close_connection = True
+
+        def log_message(self, *_):
+            pass
+
+    return Handler
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Local stand-in for an MJPEG camera stream.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--video", help="video file to loop (default: moving test pattern)")
+    parser.add_argument("--size", type=int, nargs=2, default=(640, 360), metavar=("W", "H"), help="test pattern size")
+    parser.add_argument("--fps", type=float, default=25.0)
+    parser.add_argument("--drop-after", type=float, default=0.0, help="cut each client off after this many seconds")
+    parser.add_argument("--down-for", type=float, default=0.0, help="refuse connections this long after a drop")
+    args = parser.parse_args(argv)
+
+    try:
+        frames = FrameSource(args.video, args.size[0], args.size[1])
+    except RuntimeError as e:
+        print(f"ERROR: {e}", flush=True)
+        return 1
+    server = ThreadingHTTPServer((args.host, args.port), makeHandler(frames, args.fps, args.drop_after, args.down_for))
+    server.daemon_threads = True
+    print(f"Streaming on http://{args.host}:{args.port}/stream.mjpg", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
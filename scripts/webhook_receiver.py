@@ -0,0 +1,85 @@
+"""
+Stand-in webhook receiver for trying out event notifications locally.
+
+Prints every batch it receives. --delay makes it a slow receiver and --fail-rate makes
+it answer 503 to a share of requests, to exercise batching, retries and the bounded outbox.
+
+    python scripts/webhook_receiver.py --port 8765 --delay 0.5 --fail-rate 0.2
+    python src/headless.py --source recording.mp4 --webhook http://127.0.0.1:8765/events
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def makeHandler(delayS: float, failRate: float, quiet: bool):
+    lock = threading.Lock()
+    counts = {"requests": 0, "events": 0, "failed": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"   # keep-alive, so connection reuse is visible in the log
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if delayS > 0:
+                time.sleep(delayS)
+            if random.random() < failRate:
+                with lock:
+                    counts["failed"] += 1
+                self._reply(503, b"try again")
+                return
+            batch = json.loads(body)
+            with lock:
+                counts["requests"] += 1
+                counts["events"] += len(batch.get("events", []))
+                summary = dict(counts)
+            if not quiet:
+                for ev in batch.get("events", []):
+                    print(
+                        f"{time.strftime('%H:%M:%S')} {batch.get('source')} {ev['type']:<11} event {ev['event_id']} "
+                        f"bbox={ev.get('bbox')} score={ev.get('score')} thumbnail={ev.get('thumbnail')}",
+                        flush=True,
+                    )
+            print(f"  batch of {len(batch.get('events', []))} from port {self.client_address[1]} | totals {summary}", flush=True)
+            self._reply(200, b"ok")
+
+        def _reply(self, status: int, body: bytes):
+            self.send_response(status)
+            self.send_header("Content-Type", "text/plain")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *_):
+            pass
+
+    return Handler
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Local stand-in for a webhook endpoint.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds to wait before answering")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of requests answered with 503")
+    parser.add_argument("--quiet", action="store_true", help="only print per-batch totals")
+    args = parser.parse_args(argv)
+
+    server = ThreadingHTTPServer((args.host, args.port), makeHandler(args.delay, args.fail_rate, args.quiet))
+    print(f"Listening on http://{args.host}:{args.port}/", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
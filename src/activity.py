@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import csv
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+@dataclass
+class MinuteBin:
+    frames: int = 0
+    motionFrames: int = 0
+    scoreSum: float = 0.0
+
+
+class ActivitySummary:
+
+    # Accumulates a low-resolution motion heatmap and a per-minute activity histogram
+    # during the detection pass, so no second pass over the video is needed.
+    #
+    # The float32 accumulator is the detection mask size divided by `downscale`
+    # (the mask covers only the ROI rectangle when a region is used). A mask produced at
+    # a reduced detection scale is resampled into the same accumulator.
+
+    def __init__(self, frameW: int, frameH: int, fps: float, downscale: int = 4, baseTs: Optional[float] = None):
+        self.frameSize = (int(frameW), int(frameH))
+        self.fps = max(1e-6, float(fps))
+        self.downscale = max(1, int(downscale))
+        self.baseTs = baseTs
+        self.acc: Optional[np.ndarray] = None
+        self.offset: Tuple[int, int] = (0, 0)
+        self._maskSize: Tuple[int, int] = (0, 0)
+        self._small: Optional[np.ndarray] = None
+        self.minutes: Dict[int, MinuteBin] = {}
+        self.framesSeen = 0
+
+    def update(
+        self,
+        frameIdx: int,
+        motion: bool,
+        score: float,
+        mask: Optional[np.ndarray] = None,
+        offset=(0, 0),
+        maskScale: float = 1.0,
+    ):
+        minute = int(frameIdx / self.fps // 60)
+        b = self.minutes.get(minute)
+        if b is None:
+            b = self.minutes[minute] = MinuteBin()
+        b.frames += 1
+        b.scoreSum += score
+        if motion:
+            b.motionFrames += 1
+        self.framesSeen += 1
+
+        if mask is None:
+            return
+        h, w = mask.shape[:2]
+        if maskScale < 1.0:
+            w, h = int(round(w / maskScale)), int(round(h / maskScale))
+        if self.acc is None or tuple(offset) != self.offset or abs(self._maskSize[0] - w) > 2 or abs(self._maskSize[1] - h) > 2:
+            self._maskSize = (w, h)
+            self.offset = tuple(offset)
+            aw, ah = max(1, w // self.downscale), max(1, h // self.downscale)
+            self.acc = np.zeros((ah, aw), dtype=np.float32)
+            self._small = np.empty((ah, aw), dtype=np.uint8)
+        # Nearest-neighbour subsample is enough for a heatmap and much cheaper than area averaging
+        cv2.resize(mask, (self.acc.shape[1], self.acc.shape[0]), dst=self._small, interpolation=cv2.INTER_NEAREST)
+        cv2.accumulate(self._small, self.acc)
+
+    def heatmapImage(self, background: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        BGR heatmap at full frame size; blended over `background` (BGR frame) when given.
+        """
+        fw, fh = self.frameSize
+        heat = np.zeros((fh, fw), dtype=np.uint8)
+        if self.acc is not None and float(self.acc.max()) > 0:
+            norm = cv2.normalize(self.acc, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
+            mw, mh = self._maskSize
+            ox, oy = self.offset
+            heat[oy:oy + mh, ox:ox + mw] = cv2.resize(norm, (mw, mh), interpolation=cv2.INTER_LINEAR)
+        colored = cv2.applyColorMap(heat, cv2.COLORMAP_JET)
+        if background is not None and background.shape[:2] == (fh, fw):
+            colored = cv2.addWeighted(background, 0.5, colored, 0.5, 0)
+        return colored
+
+    def saveHeatmap(self, path: Path, background: Optional[np.ndarray] = None) -> Path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if not cv2.imwrite(str(path), self.heatmapImage(background)):
+            raise RuntimeError(f"Could not write heatmap: {path}")
+        return path
+
+    def saveTimeline(self, path: Path) -> Path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(["minute", "start_s", "start_time", "frames", "motion_frames", "motion_ratio", "mean_score"])
+            for minute in sorted(self.minutes):
+                b = self.minutes[minute]
+                startS = minute * 60.0
+                startTime = ""
+                if self.baseTs is not None:
+                    startTime = datetime.fromtimestamp(self.baseTs + startS).isoformat(timespec="seconds")
+                w.writerow([
+                    minute, f"{startS:.0f}", startTime, b.frames, b.motionFrames,
+                    f"{b.motionFrames / b.frames:.4f}", f"{b.scoreSum / b.frames:.5f}",
+                ])
+        return path
+
+
+def makeActivitySummary(cfg, frameW: int, frameH: int, fps: float, baseTs: Optional[float] = None) -> Optional[ActivitySummary]:
+    if not cfg.activity_enabled:
+        return None
+    return ActivitySummary(frameW, frameH, fps, downscale=cfg.heatmap_downscale, baseTs=baseTs)
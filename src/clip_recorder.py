@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+from collections import deque
+from pathlib import Path
+from typing import Deque, Optional, Tuple
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from events import EventBuilder
+from video_io import makeWriter
+
+OVERFLOW_POLICIES = ("drop_frames", "abort_clip")
+
+
+class FrameRingBuffer:
+
+    # Keeps the most recent frames for pre-roll, bounded by count and bytes.
+
+    def __init__(self, maxFrames: int, maxBytes: int):
+        self.maxFrames = max(1, int(maxFrames))
+        self.maxBytes = max(1, int(maxBytes))
+        self._frames: Deque[Tuple[int, np.ndarray]] = deque()
+        self._bytes = 0
+        self.truncated = False
+
+    def push(self, frameIdx: int, frame: np.ndarray):
+        self._frames.append((frameIdx, frame))
+        self._bytes += frame.nbytes
+        while len(self._frames) > self.maxFrames:
+            self._popOldest()
+        while self._bytes > self.maxBytes and len(self._frames) > 1:
+            self._popOldest()
+            self.truncated = True
+
+    def _popOldest(self):
+        _, old = self._frames.popleft()
+        self._bytes -= old.nbytes
+
+    def since(self, frameIdx: int):
+        return [(i, f) for (i, f) in self._frames if i >= frameIdx]
+
+    def clear(self):
+        self._frames.clear()
+        self._bytes = 0
+
+    def __len__(self):
+        return len(self._frames)
+
+
+class ClipRecorder:
+
+    # Records one clip per live event on a background thread.
+    #
+    # Call onFrame() after EventBuilder.update() for every frame. When the builder
+    # opens an event the buffered pre-roll is handed to the writer, followed by
+    # each frame until the event closes. Detection never waits on the encoder:
+    # the writer queue is bounded by frame count and bytes (whichever is hit first)
+    # and overflow follows `overflowPolicy`.
+
+    def __init__(
+        self,
+        eventsDir: Path,
+        fps: float,
+        preRollFrames: int,
+        maxBufferMb: int = 256,
+        maxQueueFrames: int = 240,
+        overflowPolicy: str = "drop_frames",
+        logFn=None,
+        maxQueueMb: int = 256,
+    ):
+        if overflowPolicy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown clip overflow policy: {overflowPolicy}")
+
+        self.eventsDir = Path(eventsDir)
+        self.fps = float(fps)
+        self.maxQueueFrames = max(1, int(maxQueueFrames))
+        self.maxQueueBytes = max(1, int(maxQueueMb)) * 1024 * 1024
+        self.overflowPolicy = overflowPolicy
+        self.logFn = logFn
+
+        self.ring = FrameRingBuffer(preRollFrames + 1, maxBufferMb * 1024 * 1024)
+        self.sessionTag = time.strftime("%Y%m%d_%H%M%S")
+
+        self._jobs: queue.Queue = queue.Queue()
+        self._pending = 0
+        self._pendingBytes = 0
+        self._pendingLock = threading.Lock()
+        # Set by close() on timeout: the writer drops what is left instead of encoding it
+        self._abandon = threading.Event()
+
+        self._recording = False
+        self._aborted = False
+        self._clipStartIdx = 0
+        self._clipPartPath: Optional[Path] = None
+        self._eventCountAtStart = 0
+        self._droppedInClip = 0
+        self._warnedTruncated = False
+
+        self.clipsWritten = 0
+        self.framesDropped = 0
+
+        self._thread = threading.Thread(target=self._writerLoop, name="ClipWriter", daemon=True)
+        self._thread.start()
+
+    def writeLog(self, msg: str):
+        if self.logFn:
+            self.logFn(msg)
+
+    @property
+    def pendingFrames(self) -> int:
+        with self._pendingLock:
+            return self._pending
+
+    # Capture side (detection thread)
+
+    def onFrame(self, frameIdx: int, frameRgb: np.ndarray, builder: EventBuilder):
+        """
+        frameRgb must not be modified by the caller afterwards (pass a copy if overlays are drawn on it).
+        """
+        self.ring.push(frameIdx, frameRgb)
+        if self.ring.truncated and not self._warnedTruncated:
+            self._warnedTruncated = True
+            self.writeLog(f"Clip pre-roll limited to {len(self.ring)} frames by clip_buffer_max_mb.")
+
+        if not self._recording and builder.active:
+            self._startClip(builder)
+            for idx, frame in self.ring.since(self._clipStartIdx):
+                self._enqueueFrame(frame)
+        elif self._recording and builder.active:
+            self._enqueueFrame(frameRgb)
+        elif self._recording and not builder.active:
+            self._endClip(builder)
+
+    def finish(self, builder: EventBuilder):
+        # Call after builder.finalize() so a clip that was still open is kept or discarded correctly
+        if self._recording:
+            self._endClip(builder)
+
+    def close(self, timeoutS: float = 10.0):
+        """
+        Waits up to timeoutS for queued frames to be written. After that the writer drops
+        what is still queued and discards the clip in progress, so a caller on the UI
+        thread can pass a short timeout.
+        """
+        self._jobs.put(("stop", None))
+        self._thread.join(timeoutS)
+        if self._thread.is_alive():
+            with self._pendingLock:
+                pending, pendingBytes = self._pending, self._pendingBytes
+            self._abandon.set()
+            self.writeLog(
+                f"Clip writer still busy after {timeoutS:g}s: abandoned {pending} queued frames "
+                f"({pendingBytes / (1024 * 1024):.0f} MB) and any clip in progress."
+            )
+        self.ring.clear()
+
+    def _startClip(self, builder: EventBuilder):
+        self._recording = True
+        self._aborted = False
+        self._droppedInClip = 0
+        self._clipStartIdx = builder.activeStartIdx
+        self._eventCountAtStart = len(builder.events)
+        self._clipPartPath = self.eventsDir / f"live_{self.sessionTag}_from_{self._clipStartIdx}.tmp.mp4"
+        self._jobs.put(("start", self._clipPartPath))
+
+    def _endClip(self, builder: EventBuilder):
+        self._recording = False
+        finalPath = None
+        if not self._aborted and len(builder.events) > self._eventCountAtStart:
+            ev = builder.events[-1]
+            if ev.startIdx == self._clipStartIdx:
+                finalPath = self.eventsDir / f"live_{self.sessionTag}_event_{ev.id:04d}.mp4"
+        if self._droppedInClip:
+            self.writeLog(f"Clip writer behind: dropped {self._droppedInClip} frames ({self.overflowPolicy}).")
+        self._jobs.put(("end", finalPath))
+
+    def _enqueueFrame(self, frameRgb: np.ndarray):
+        if self._aborted:
+            return
+        with self._pendingLock:
+            full = (
+                self._pending >= self.maxQueueFrames
+                or (self._pending > 0 and self._pendingBytes + frameRgb.nbytes > self.maxQueueBytes)
+            )
+            if not full:
+                self._pending += 1
+                self._pendingBytes += frameRgb.nbytes
+        if not full:
+            self._jobs.put(("frame", frameRgb))
+            return
+
+        self.framesDropped += 1
+        self._droppedInClip += 1
+        if self.overflowPolicy == "abort_clip":
+            self._aborted = True
+            self._jobs.put(("abort", None))
+            self.writeLog("Clip writer behind: aborting current clip (abort_clip).")
+        elif self._droppedInClip == 1:
+            self.writeLog("Clip writer behind: dropping frames from current clip (drop_frames).")
+
+    # Writer side (background thread)
+
+    def _writerLoop(self):
+        writer = None
+        partPath: Optional[Path] = None
+        while True:
+            kind, payload = self._jobs.get()
+
+            if self._abandon.is_set():
+                # close() gave up waiting: drop the rest and leave no partial clip behind
+                if kind == "frame":
+                    with self._pendingLock:
+                        self._pending -= 1
+                        self._pendingBytes -= payload.nbytes
+                writer = self._discard(writer, partPath)
+                partPath = None
+                if kind == "stop":
+                    return
+                continue
+
+            if kind == "frame":
+                with self._pendingLock:
+                    self._pending -= 1
+                    self._pendingBytes -= payload.nbytes
+                if partPath is None:
+                    continue
+                try:
+                    if writer is None:
+                        h, w = payload.shape[:2]
+                        writer = makeWriter(partPath, self.fps, w, h)
+                    writer.write(cv2.cvtColor(payload, cv2.COLOR_RGB2BGR))
+                except Exception as e:
+                    self.writeLog(f"ERROR (clip writer): {e}")
+                    writer = self._discard(writer, partPath)
+                    partPath = None
+
+            elif kind == "start":
+                writer = self._discard(writer, partPath)
+                partPath = payload
+
+            elif kind in ("end", "abort", "stop"):
+                if writer is not None:
+                    writer.release()
+                    writer = None
+                if partPath is not None:
+                    if kind == "end" and payload is not None and partPath.exists():
+                        partPath.replace(payload)
+                        self.clipsWritten += 1
+                        self.writeLog(f"Saved event clip: {payload}")
+                    else:
+                        partPath.unlink(missing_ok=True)
+                partPath = None
+                if kind == "stop":
+                    return
+
+    @staticmethod
+    def _discard(writer, partPath: Optional[Path]):
+        if writer is not None:
+            writer.release()
+        if partPath is not None:
+            partPath.unlink(missing_ok=True)
+        return None
+
+
+def makeClipRecorder(cfg, fps: float, logFn=None) -> Optional[ClipRecorder]:
+    if not cfg.record_live_clips:
+        return None
+    eventsDir = Path(cfg.output_dir) / cfg.events_dirname
+    eventsDir.mkdir(parents=True, exist_ok=True)
+    return ClipRecorder(
+        eventsDir,
+        fps,
+        cfg.pre_roll_frames,
+        maxBufferMb=cfg.clip_buffer_max_mb,
+        maxQueueFrames=cfg.clip_queue_frames,
+        overflowPolicy=cfg.clip_overflow_policy,
+        logFn=logFn,
+        maxQueueMb=cfg.clip_queue_max_mb,
+    )
@@ -8,6 +8,13 @@ def _default_output_dir() -> Path:
         return Path(env).expanduser()
     return Path.home() / "MotionDetection" / "output"
 
+# GUI preset name -> (diff_threshold, min_contour_area)
+SENSITIVITY_PRESETS = {
+    "Low sensitivity": (40, 1500),
+    "Balanced": (25, 800),
+    "High sensitivity": (15, 400),
+}
+
 @dataclass
 class AppConfig:
     # Motion detection
@@ -17,14 +24,63 @@ class AppConfig:
     dilate_iters: int = 2
     erode_iters: int = 1
 
+    # Regions: source name (or "*") -> roi.RegionConfig with ROI / exclusion polygons
+    regions: dict = field(default_factory=dict)
+
+    # Tracking (associates boxes across frames; short-lived tracks never reach events)
+    tracking_enabled: bool = False
+    track_iou_threshold: float = 0.2
+    track_max_distance: int = 80      # px, centroid fallback when boxes do not overlap
+    track_max_misses: int = 5         # frames a track survives without a match
+    track_min_hits: int = 3           # matches before a track counts as motion
+
     # Event segmentation
     pre_roll_frames: int = 10         # include frames before motion starts
     post_roll_frames: int = 15        # include frames after motion ends
     min_event_frames: int = 8         # ignore very short events
 
+    # Input
+    prefetch_frames: int = 8          # frames decoded ahead on a background thread (0 = off)
+
+    # Live clip recording
+    record_live_clips: bool = True
+    clip_buffer_max_mb: int = 256     # cap on pre-roll ring buffer memory
+    clip_queue_frames: int = 240      # frames waiting for the clip writer
+    clip_queue_max_mb: int = 256      # cap on memory held by frames waiting for the writer
+    clip_overflow_policy: str = "drop_frames"  # or "abort_clip"
+
+    # Event database (SQLite, appended across runs)
+    event_db_enabled: bool = False
+    event_db_name: str = "events.sqlite3"
+    event_db_batch_size: int = 50
+
+    # Webhook notifications (event start/end POSTed as JSON batches; empty = off)
+    webhook_urls: list = field(default_factory=list)
+    webhook_batch_size: int = 20
+    webhook_flush_interval_s: float = 0.25   # wait this long for more events before posting
+    webhook_max_outbox: int = 1000    # per endpoint; oldest dropped when full
+    webhook_max_retries: int = 5
+    webhook_timeout_s: float = 5.0
+
+    # Activity summary (motion heatmap + per-minute timeline)
+    activity_enabled: bool = True
+    heatmap_downscale: int = 4        # accumulator = detection size / this
+
+    # Event thumbnails (best frame of each batch event, cropped to its bbox) + JSON index
+    thumbnails_enabled: bool = True
+    thumbnail_max_side: int = 240     # px
+    thumbnail_jpeg_quality: int = 85
+
     # Output
     output_dir: Path = field(default_factory=_default_output_dir)
     events_dirname: str = "events"
     highlight_name: str = "highlight.mp4"
     events_csv_name: str = "events.csv"
     live_events_csv_name: str = "live_events.csv"
+    sweep_csv_name: str = "sweep.csv"
+    heatmap_name: str = "heatmap.png"
+    timeline_name: str = "activity.csv"
+    live_heatmap_name: str = "live_heatmap.png"
+    live_timeline_name: str = "live_activity.csv"
+    thumbnails_dirname: str = "thumbnails"
+    event_index_name: str = "events.json"
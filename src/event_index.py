@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import List, Optional
+
+import cv2
+import numpy as np
+
+from events import Event, EventBuilder
+
+
+class EventThumbnailer:
+
+    # Keeps the highest-scoring motion frame of the open event (one reusable frame buffer)
+    # and, when the EventBuilder closes the event, saves it as a JPEG cropped to the event
+    # bbox. Runs inside the detection pass, so no frame is decoded twice. Pass it to
+    # chainCallbacks ahead of the notifier to have the file written before the event is
+    # sent; otherwise it is saved on the next update()/finish().
+
+    def __init__(self, thumbnailsDir: Path, maxSide: int = 240, jpegQuality: int = 85):
+        self.thumbnailsDir = Path(thumbnailsDir)
+        self.maxSide = max(16, int(maxSide))
+        self.jpegQuality = int(jpegQuality)
+        self.entries: List[dict] = []
+
+        self._best: Optional[np.ndarray] = None
+        self._bestIdx = -1
+        self._bestScore = -1.0
+        self._openStart = -1
+        self._seen = 0
+
+    def update(self, frameIdx: int, motion: bool, score: float, frame: np.ndarray, builder: EventBuilder):
+        """
+        Call after builder.update() with the unannotated frame.
+        """
+        self._saveClosed(builder)
+
+        if not builder.active:
+            # A too-short event is dropped by the builder without being emitted
+            self._openStart = -1
+            return
+        if builder.activeStartIdx != self._openStart:
+            self._openStart = builder.activeStartIdx
+            self._bestIdx = -1
+            self._bestScore = -1.0
+        if motion and score > self._bestScore:
+            if self._best is None or self._best.shape != frame.shape:
+                self._best = np.empty_like(frame)
+            np.copyto(self._best, frame)
+            self._bestIdx = frameIdx
+            self._bestScore = score
+
+    def finish(self, builder: EventBuilder):
+        # After builder.finalize(), for the event that was still open
+        self._saveClosed(builder)
+
+    def __call__(self, ev: Event):
+        # EventBuilder onEvent callback: the best frame still belongs to the event closing now
+        self._seen += 1
+        self._close(ev)
+
+    def pathFor(self, ev: Event) -> Path:
+        # Where the event's thumbnail is (or will be, once the event has closed) saved
+        return self.thumbnailsDir / f"event_{ev.id:04d}.jpg"
+
+    def thumbnailFor(self, ev: Event) -> Optional[Path]:
+        # The saved thumbnail of a closed event, or None if it has none (yet)
+        for entry in reversed(self.entries):
+            if entry["event_id"] == ev.id:
+                return entry["thumbnail"]
+        return None
+
+    def _saveClosed(self, builder: EventBuilder):
+        events = builder.events
+        while self._seen < len(events):
+            ev = events[self._seen]
+            self._seen += 1
+            self._close(ev)
+
+    def _close(self, ev: Event):
+        if self._bestIdx >= 0 and self._openStart == ev.startIdx:
+            self.entries.append(self._save(ev))
+        self._bestIdx = -1
+        self._bestScore = -1.0
+        self._openStart = -1
+
+    def _save(self, ev: Event) -> dict:
+        crop = self._best
+        if ev.bbox:
+            x, y, w, h = ev.bbox
+            fh, fw = crop.shape[:2]
+            pad = max(8, int(0.1 * max(w, h)))
+            x0, y0 = max(0, x - pad), max(0, y - pad)
+            x1, y1 = min(fw, x + w + pad), min(fh, y + h + pad)
+            crop = crop[y0:y1, x0:x1]
+        ch, cw = crop.shape[:2]
+        scale = self.maxSide / float(max(ch, cw))
+        if scale < 1.0:
+            crop = cv2.resize(crop, (max(1, int(cw * scale)), max(1, int(ch * scale))), interpolation=cv2.INTER_AREA)
+
+        self.thumbnailsDir.mkdir(parents=True, exist_ok=True)
+        path = self.pathFor(ev)
+        if not cv2.imwrite(str(path), crop, [cv2.IMWRITE_JPEG_QUALITY, self.jpegQuality]):
+            raise RuntimeError(f"Could not write thumbnail: {path}")
+        return {"event_id": ev.id, "thumbnail": path, "keyframe": self._bestIdx, "score": self._bestScore}
+
+
+def makeThumbnailer(cfg, outputDir: Path) -> Optional[EventThumbnailer]:
+    if not cfg.thumbnails_enabled:
+        return None
+    return EventThumbnailer(outputDir / cfg.thumbnails_dirname, cfg.thumbnail_max_side, cfg.thumbnail_jpeg_quality)
+
+
+def writeEventIndex(
+    path: Path,
+    events: List[Event],
+    fps: float,
+    videoPath: Path,
+    highlightPath: Path,
+    thumbnailer: Optional[EventThumbnailer] = None,
+) -> Path:
+    """
+    JSON index of the run: one entry per event with its frame range, timestamps, bbox,
+    keyframe and thumbnail (paths relative to the index). `seek_frame` is the position
+    of the event's first frame in the highlight video, which starts at source frame 1.
+    """
+    thumbs = {e["event_id"]: e for e in thumbnailer.entries} if thumbnailer is not None else {}
+    base = path.parent
+    out = []
+    for ev in events:
+        t = thumbs.get(ev.id)
+        out.append({
+            "id": ev.id,
+            "start_frame": ev.startIdx,
+            "end_frame": ev.endIdx,
+            "start_s": round(ev.startIdx / fps, 3),
+            "end_s": round(ev.endIdx / fps, 3),
+            "seek_frame": max(0, ev.startIdx - 1),
+            "bbox": list(ev.bbox) if ev.bbox else None,
+            "keyframe": t["keyframe"] if t else None,
+            "score": round(t["score"], 5) if t else None,
+            "thumbnail": t["thumbnail"].relative_to(base).as_posix() if t else None,
+        })
+    index = {
+        "video": str(videoPath),
+        "highlight": highlightPath.relative_to(base).as_posix(),
+        "fps": fps,
+        "events": out,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2)
+    return path
+
+
+def loadEventIndex(path: Path) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import tkinter as tk
+from tkinter import ttk, messagebox
+from pathlib import Path
+
+import cv2
+from PIL import Image, ImageTk
+
+from config import AppConfig
+from event_index import loadEventIndex
+
+
+class EventReviewWindow(tk.Toplevel):
+
+    # Thumbnail grid built from events.json; clicking an event seeks the highlight video
+    # straight to its first frame and plays the event range.
+
+    GRID_COLUMNS = 3
+
+    def __init__(self, parent, cfg: AppConfig, logFn=None):
+        super().__init__(parent)
+        self.title("Event Review")
+        self.geometry("1100x650")
+
+        self.cfg = cfg
+        self.logFn = logFn
+        self.outputDir = Path(cfg.output_dir)
+        self.indexPath = self.outputDir / cfg.event_index_name
+
+        self.index: dict = {}
+        self.capture = None
+        self.playAfterId = None
+        self.playRemaining = 0
+        self.thumbImages = []
+        self.previewImage = None
+
+        # Top bar
+        topBar = ttk.Frame(self, padding=10)
+        topBar.pack(fill="x")
+        ttk.Button(topBar, text="Reload", command=self.reload).pack(side="left")
+        self.status = tk.StringVar(value="")
+        ttk.Label(topBar, textvariable=self.status).pack(side="left", padx=10)
+
+        body = ttk.Frame(self, padding=(10, 0, 10, 10))
+        body.pack(fill="both", expand=True)
+
+        # Scrollable thumbnail grid
+        gridFrame = ttk.Frame(body)
+        gridFrame.pack(side="left", fill="y")
+        self.gridCanvas = tk.Canvas(gridFrame, width=3 * 250, highlightthickness=0)
+        scroll = ttk.Scrollbar(gridFrame, orient="vertical", command=self.gridCanvas.yview)
+        self.gridCanvas.configure(yscrollcommand=scroll.set)
+        scroll.pack(side="right", fill="y")
+        self.gridCanvas.pack(side="left", fill="y", expand=True)
+        self.gridInner = ttk.Frame(self.gridCanvas)
+        self.gridCanvas.create_window((0, 0), window=self.gridInner, anchor="nw")
+        self.gridInner.bind(
+            "<Configure>", lambda _e: self.gridCanvas.configure(scrollregion=self.gridCanvas.bbox("all"))
+        )
+
+        # Preview
+        previewFrame = ttk.Frame(body)
+        previewFrame.pack(side="left", fill="both", expand=True, padx=(10, 0))
+        self.previewLabel = ttk.Label(previewFrame, anchor="center")
+        self.previewLabel.pack(fill="both", expand=True)
+        self.previewInfo = tk.StringVar(value="Click an event to play it.")
+        ttk.Label(previewFrame, textvariable=self.previewInfo).pack(fill="x", pady=(6, 0))
+
+        self.protocol("WM_DELETE_WINDOW", self.onClose)
+        self.reload()
+
+    def writeLog(self, msg: str):
+        if self.logFn:
+            self.logFn(msg)
+
+    def reload(self):
+        self._stopPlayback()
+        if self.capture is not None:
+            self.capture.release()
+            self.capture = None
+        for child in self.gridInner.winfo_children():
+            child.destroy()
+        self.thumbImages = []
+
+        if not self.indexPath.exists():
+            self.status.set(f"No event index yet ({self.indexPath.name}). Run a video first.")
+            return
+        try:
+            self.index = loadEventIndex(self.indexPath)
+        except Exception as e:
+            messagebox.showerror("Event Review", f"Could not read {self.indexPath}:\n{e}")
+            return
+
+        events = self.index.get("events", [])
+        self.status.set(f"{Path(self.index.get('video', '')).name} | {len(events)} events")
+        for i, ev in enumerate(events):
+            self._addTile(i, ev)
+
+    def _addTile(self, i: int, ev: dict):
+        tile = ttk.Frame(self.gridInner, padding=4)
+        tile.grid(row=i // self.GRID_COLUMNS, column=i % self.GRID_COLUMNS, sticky="n")
+
+        image = None
+        if ev.get("thumbnail"):
+            try:
+                image = ImageTk.PhotoImage(Image.open(self.outputDir / ev["thumbnail"]))
+            except Exception:
+                image = None
+        self.thumbImages.append(image)
+
+        thumb = ttk.Label(tile, image=image, text="" if image else "(no thumbnail)", cursor="hand2")
+        thumb.pack()
+        caption = ttk.Label(tile, text=f"#{ev['id']}  {ev['start_s']:.1f}s - {ev['end_s']:.1f}s", cursor="hand2")
+        caption.pack()
+        for w in (tile, thumb, caption):
+            w.bind("<Button-1>", lambda _e, ev=ev: self.playEvent(ev))
+
+    def playEvent(self, ev: dict):
+        self._stopPlayback()
+        if self.capture is None:
+            highlightPath = self.outputDir / self.index.get("highlight", self.cfg.highlight_name)
+            self.capture = cv2.VideoCapture(str(highlightPath))
+            if not self.capture.isOpened():
+                self.capture = None
+                messagebox.showerror("Event Review", f"Could not open {highlightPath}")
+                return
+
+        # Seek instead of decoding from the start
+        self.capture.set(cv2.CAP_PROP_POS_FRAMES, ev["seek_frame"])
+        self.playRemaining = ev["end_frame"] - ev["start_frame"] + 1
+        self.previewInfo.set(
+            f"Event {ev['id']}: frames {ev['start_frame']}-{ev['end_frame']} "
+            f"({ev['start_s']:.2f}s - {ev['end_s']:.2f}s)"
+        )
+        self._playNext()
+
+    def _playNext(self):
+        self.playAfterId = None
+        if self.capture is None or self.playRemaining <= 0:
+            return
+        ok, frame = self.capture.read()
+        if not ok:
+            return
+        self.playRemaining -= 1
+
+        targetW = self.previewLabel.winfo_width()
+        targetH = self.previewLabel.winfo_height()
+        h, w = frame.shape[:2]
+        if targetW > 1 and targetH > 1:
+            scale = min(targetW / w, targetH / h)
+            frame = cv2.resize(frame, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+        self.previewImage = ImageTk.PhotoImage(Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)))
+        self.previewLabel.config(image=self.previewImage)
+
+        fps = float(self.index.get("fps") or 25.0)
+        self.playAfterId = self.after(max(1, int(1000 / fps)), self._playNext)
+
+    def _stopPlayback(self):
+        if self.playAfterId is not None:
+            try:
+                self.after_cancel(self.playAfterId)
+            except Exception:
+                pass
+            self.playAfterId = None
+
+    def onClose(self):
+        self._stopPlayback()
+        if self.capture is not None:
+            self.capture.release()
+            self.capture = None
+        self.destroy()
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import sqlite3
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from events import Event
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    row_id      INTEGER PRIMARY KEY,
+    source      TEXT NOT NULL,
+    session     TEXT NOT NULL,
+    event_id    INTEGER NOT NULL,
+    start_frame INTEGER NOT NULL,
+    end_frame   INTEGER NOT NULL,
+    start_ts    REAL NOT NULL,
+    end_ts      REAL NOT NULL,
+    bbox_x      INTEGER,
+    bbox_y      INTEGER,
+    bbox_w      INTEGER,
+    bbox_h      INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_events_start_ts ON events (start_ts);
+CREATE INDEX IF NOT EXISTS idx_events_source_start_ts ON events (source, start_ts);
+"""
+
+STORE_CSV_HEADER = ["source", "session", "event_id", "start_frame", "end_frame", "start_time", "end_time", "duration_s", "bbox_x", "bbox_y", "bbox_w", "bbox_h"]
+
+
+@dataclass
+class StoredEvent:
+    source: str
+    session: str
+    eventId: int
+    startIdx: int
+    endIdx: int
+    startTs: float                      # unix epoch seconds
+    endTs: float
+    bbox: Optional[Tuple[int, int, int, int]] = None
+
+
+class EventStore:
+
+    # Append-only SQLite store for events across runs and sessions (WAL mode, batched inserts).
+    # A connection belongs to the thread that opened the store.
+
+    def __init__(self, dbPath: Path, batchSize: int = 50):
+        self.dbPath = Path(dbPath)
+        self.dbPath.parent.mkdir(parents=True, exist_ok=True)
+        self.batchSize = max(1, int(batchSize))
+        self._pending: List[tuple] = []
+
+        self._conn = sqlite3.connect(str(self.dbPath))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def add(self, ev: Event, source: str, session: str, startTs: float, endTs: float):
+        x = y = w = h = None
+        if ev.bbox:
+            x, y, w, h = (int(v) for v in ev.bbox)
+        self._pending.append((source, session, ev.id, ev.startIdx, ev.endIdx, startTs, endTs, x, y, w, h))
+        if len(self._pending) >= self.batchSize:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO events (source, session, event_id, start_frame, end_frame, start_ts, end_ts, "
+                "bbox_x, bbox_y, bbox_w, bbox_h) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                self._pending,
+            )
+        self._pending = []
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+
+    def query(
+        self,
+        startTs: Optional[float] = None,
+        endTs: Optional[float] = None,
+        source: Optional[str] = None,
+        region: Optional[Tuple[int, int, int, int]] = None,
+        limit: Optional[int] = None,
+    ) -> List[StoredEvent]:
+        """
+        Events overlapping [startTs, endTs] (unix seconds), optionally for one source and
+        only those whose bbox intersects region (x, y, w, h).
+        """
+        self.flush()
+        where = []
+        args: list = []
+        if startTs is not None:
+            where.append("end_ts >= ?")
+            args.append(startTs)
+        if endTs is not None:
+            where.append("start_ts <= ?")
+            args.append(endTs)
+        if source is not None:
+            where.append("source = ?")
+            args.append(source)
+        if region is not None:
+            rx, ry, rw, rh = region
+            where.append("bbox_x IS NOT NULL AND bbox_x < ? AND bbox_x + bbox_w > ? AND bbox_y < ? AND bbox_y + bbox_h > ?")
+            args += [rx + rw, rx, ry + rh, ry]
+
+        sql = "SELECT source, session, event_id, start_frame, end_frame, start_ts, end_ts, bbox_x, bbox_y, bbox_w, bbox_h FROM events"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY start_ts"
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append(int(limit))
+
+        out = []
+        for row in self._conn.execute(sql, args):
+            bbox = None if row[7] is None else (row[7], row[8], row[9], row[10])
+            out.append(StoredEvent(row[0], row[1], row[2], row[3], row[4], row[5], row[6], bbox))
+        return out
+
+    def exportCsv(self, path: Path, **queryArgs) -> int:
+        rows = self.query(**queryArgs)
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(STORE_CSV_HEADER)
+            for ev in rows:
+                x, y, bw, bh = ev.bbox if ev.bbox else ("", "", "", "")
+                w.writerow([
+                    ev.source, ev.session, ev.eventId, ev.startIdx, ev.endIdx,
+                    datetime.fromtimestamp(ev.startTs).isoformat(timespec="seconds"),
+                    datetime.fromtimestamp(ev.endTs).isoformat(timespec="seconds"),
+                    f"{ev.endTs - ev.startTs:.3f}", x, y, bw, bh,
+                ])
+        return len(rows)
+
+
+class EventSink:
+
+    # Binds an EventStore to one run: pass as EventBuilder(onEvent=sink).
+    # Frame indices are turned into wall-clock time as baseTs + frame / fps.
+
+    def __init__(self, store: EventStore, source: str, fps: float, baseTs: Optional[float] = None, session: Optional[str] = None):
+        self.store = store
+        self.source = source
+        self.fps = max(1e-6, float(fps))
+        self.baseTs = time.time() if baseTs is None else float(baseTs)
+        self.session = session or f"{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+
+    def __call__(self, ev: Event):
+        self.store.add(
+            ev,
+            self.source,
+            self.session,
+            self.baseTs + ev.startIdx / self.fps,
+            self.baseTs + ev.endIdx / self.fps,
+        )
+
+    def close(self):
+        self.store.close()
+
+
+def openEventSink(cfg, source: str, fps: float, baseTs: Optional[float] = None) -> Optional[EventSink]:
+    if not cfg.event_db_enabled:
+        return None
+    store = EventStore(Path(cfg.output_dir) / cfg.event_db_name, batchSize=cfg.event_db_batch_size)
+    return EventSink(store, source, fps, baseTs=baseTs)
+
+
+def _parseTime(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    return datetime.fromisoformat(value).timestamp()
+
+
+def main(argv=None) -> int:
+    from config import AppConfig
+
+    parser = argparse.ArgumentParser(description="Query the motion event database.")
+    parser.add_argument("--db", type=Path, help="database path (default: output folder)")
+    parser.add_argument("--since", help="ISO time, e.g. 2026-10-12T02:00")
+    parser.add_argument("--until", help="ISO time, e.g. 2026-10-12T04:00")
+    parser.add_argument("--source", help="only events from this source, e.g. 'camera 2'")
+    parser.add_argument("--region", type=int, nargs=4, metavar=("X", "Y", "W", "H"), help="only events whose bbox intersects this region")
+    parser.add_argument("--csv", type=Path, help="write results to this CSV instead of printing")
+    args = parser.parse_args(argv)
+
+    cfg = AppConfig()
+    store = EventStore(args.db or Path(cfg.output_dir) / cfg.event_db_name)
+    queryArgs = dict(startTs=_parseTime(args.since), endTs=_parseTime(args.until), source=args.source,
+                     region=tuple(args.region) if args.region else None)
+    try:
+        if args.csv:
+            n = store.exportCsv(args.csv, **queryArgs)
+            print(f"Exported {n} events to {args.csv}")
+        else:
+            for ev in store.query(**queryArgs):
+                start = datetime.fromtimestamp(ev.startTs).isoformat(timespec="seconds")
+                print(f"{start}  {ev.endTs - ev.startTs:7.2f}s  {ev.source}  session={ev.session}  event={ev.eventId}  bbox={ev.bbox}")
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
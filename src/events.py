@@ -1,6 +1,8 @@
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import Optional, Tuple, List
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple, List
+
+EVENTS_CSV_HEADER = ["event_id", "start_frame", "end_frame", "start_s", "end_s", "duration_s", "bbox_x", "bbox_y", "bbox_w", "bbox_h"]
 
 @dataclass
 class Event:
@@ -9,6 +11,37 @@ class Event:
     endIdx: int
     # aggregate bounding box for the event 
     bbox: Optional[Tuple[int, int, int, int]] = None
+    # per-track bounding boxes (track id -> bbox) when a tracker is used
+    tracks: Dict[int, Tuple[int, int, int, int]] = field(default_factory=dict)
+    # highest per-frame motion score seen during the event
+    score: float = 0.0
+
+def eventDurationS(ev: Event, fps: float) -> float:
+    # Same span as the CSV start_s/end_s columns
+    return (ev.endIdx - ev.startIdx) / fps
+
+def eventCsvRow(ev: Event, fps: float) -> list:
+    startS = ev.startIdx / fps
+    endS = ev.endIdx / fps
+    dur = eventDurationS(ev, fps)
+    if ev.bbox:
+        x, y, bw, bh = ev.bbox
+    else:
+        x = y = bw = bh = ""
+    return [ev.id, ev.startIdx, ev.endIdx, f"{startS:.3f}", f"{endS:.3f}", f"{dur:.3f}", x, y, bw, bh]
+
+def chainCallbacks(*callbacks):
+    # Several onEvent consumers for one EventBuilder; None entries are skipped
+    active = [c for c in callbacks if c is not None]
+    if not active:
+        return None
+    if len(active) == 1:
+        return active[0]
+
+    def call(ev: Event):
+        for c in active:
+            c(ev)
+    return call
 
 def _mergeBbox(a, b):
     ax, ay, aw, ah = a
@@ -23,59 +56,114 @@ class EventBuilder:
 
     # Builds motion events from per-frame motion detections.
 
-    def __init__(self, preRoll: int, postRoll: int, minEventFrames: int):
+    def __init__(self, preRoll: int, postRoll: int, minEventFrames: int, onEvent=None, onEventStart=None):
         self.preRoll = preRoll
         self.postRoll = postRoll
         self.minEventFrames = minEventFrames
+        # optional callback(Event) for every event that is kept
+        self.onEvent = onEvent
+        # optional callback(Event) once an open event is long enough to be kept; the Event
+        # carries the final id, with endIdx/bbox/score as seen so far. Always precedes onEvent.
+        self.onEventStart = onEventStart
 
         self._active = False
         self._startIdx = 0
         self._lastMotionIdx = -1
         self._bbox = None
+        self._tracks: Dict[int, Tuple[int, int, int, int]] = {}
+        self._score = 0.0
+        self._announced = False
         self._events: List[Event] = []
         self._nextId = 1
 
-    def update(self, frameIdx: int, motion: bool, boxes):
+    def update(self, frameIdx: int, motion: bool, boxes, trackBoxes=None, score: float = 0.0):
         if motion:
             if not self._active:
                 self._active = True
                 self._startIdx = max(0, frameIdx - self.preRoll)
                 self._bbox = None
+                self._tracks = {}
+                self._score = 0.0
+                self._announced = False
 
             self._lastMotionIdx = frameIdx
+            self._score = max(self._score, score)
 
             # merge boxes into an event bbox
             for b in boxes:
                 self._bbox = b if self._bbox is None else _mergeBbox(self._bbox, b)
 
+            # and per track, when boxes come from a tracker
+            if trackBoxes:
+                for tid, b in trackBoxes.items():
+                    prev = self._tracks.get(tid)
+                    self._tracks[tid] = b if prev is None else _mergeBbox(prev, b)
+
         if self._active and (not motion):
             # close if gone past post-roll frames
             if self._lastMotionIdx >= 0 and frameIdx > self._lastMotionIdx + self.postRoll:
                 endIdx = self._lastMotionIdx + self.postRoll
                 if (endIdx - self._startIdx + 1) >= self.minEventFrames:
-                    self._events.append(Event(
+                    self._emit(Event(
                         id=self._nextId,
                         startIdx=self._startIdx,
                         endIdx=endIdx,
-                        bbox=self._bbox
+                        bbox=self._bbox,
+                        tracks=self._tracks,
+                        score=self._score,
                     ))
                     self._nextId += 1
                 self._active = False
                 self._bbox = None
+                self._tracks = {}
                 self._lastMotionIdx = -1
 
+        # Once the span reaches minEventFrames the event is certain to be kept
+        if self._active and not self._announced and (frameIdx - self._startIdx + 1) >= self.minEventFrames:
+            self._announce(frameIdx)
+
+    def _announce(self, frameIdx: int):
+        self._announced = True
+        if self.onEventStart is not None:
+            self.onEventStart(Event(
+                id=self._nextId,
+                startIdx=self._startIdx,
+                endIdx=frameIdx,
+                bbox=self._bbox,
+                tracks=dict(self._tracks),
+                score=self._score,
+            ))
+
+    def _emit(self, ev: Event):
+        if not self._announced:
+            self._announce(ev.endIdx)
+        self._events.append(ev)
+        if self.onEvent is not None:
+            self.onEvent(ev)
+
     def finalize(self, lastFrameIdx: int):
         if self._active:
             endIdx = min(lastFrameIdx, (self._lastMotionIdx + self.postRoll) if self._lastMotionIdx >= 0 else lastFrameIdx)
             if (endIdx - self._startIdx + 1) >= self.minEventFrames:
-                self._events.append(Event(
+                self._emit(Event(
                     id=self._nextId,
                     startIdx=self._startIdx,
                     endIdx=endIdx,
-                    bbox=self._bbox
+                    bbox=self._bbox,
+                    tracks=self._tracks,
+                    score=self._score,
                 ))
             self._active = False
 
+    @property
+    def active(self) -> bool:
+        return self._active
+
+    @property
+    def activeStartIdx(self) -> int:
+        # first frame (including pre-roll) of the event currently open
+        return self._startIdx
+
     @property
     def events(self) -> List[Event]:
         return self._events
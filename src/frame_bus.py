@@ -0,0 +1,534 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+import multiprocessing as mp
+import queue
+import time
+
+import numpy as np
+
+from clip_recorder import makeClipRecorder
+from events import Event
+from live_feed import LiveFeedController, LiveFeedConfig
+
+SLOW_READER_POLICIES = ("latest", "oldest")
+
+
+@dataclass
+class RingSpec:
+    # Everything a consumer process needs to attach to a ring
+    name: str
+    shape: Tuple[int, int, int]
+    slots: int
+    fps: float = 0.0            # capture rate (source fps, or the configured rate for cameras)
+    sourceName: str = ""
+    cursors: int = 0            # reader cursors the writer waits for when `isLive` is False
+    isLive: bool = True         # camera/stream: never wait for readers; recorded: lose no frame
+
+
+class FrameRing:
+
+    # Fixed ring of frame slots in one shared-memory block, one writer and any number of readers.
+    #
+    # Layout: int64[1 + slots] (head sequence, then the sequence stored in each slot),
+    # int64[cursors] (last sequence each registered reader is done with), float64[slots]
+    # (capture time, time.monotonic()), then `slots` frames of `shape` uint8.
+    # A live writer never waits: a slot's sequence is set to 0 while it is being written, so a
+    # reader can tell when a frame it is looking at has been overwritten (see isCurrent()).
+    # A recorded source instead waits in waitForReaders() until every cursor is past the slot
+    # it is about to reuse, so the slowest registered reader sets the pace and nothing is lost.
+
+    def __init__(self, spec: RingSpec, shm: shared_memory.SharedMemory, owner: bool):
+        self.spec = spec
+        self.shm = shm
+        self.owner = owner
+
+        n, c = spec.slots, spec.cursors
+        headerBytes = 8 * (1 + n) + 8 * c + 8 * n
+        self._seqs = np.ndarray((1 + n,), dtype=np.int64, buffer=shm.buf, offset=0)
+        self._acks = np.ndarray((c,), dtype=np.int64, buffer=shm.buf, offset=8 * (1 + n))
+        self._times = np.ndarray((n,), dtype=np.float64, buffer=shm.buf, offset=8 * (1 + n + c))
+        self.frames = np.ndarray((n,) + tuple(spec.shape), dtype=np.uint8, buffer=shm.buf, offset=headerBytes)
+
+    @staticmethod
+    def _nbytes(shape, slots: int, cursors: int = 0) -> int:
+        return 8 * (1 + slots) + 8 * cursors + 8 * slots + slots * int(np.prod(shape))
+
+    @classmethod
+    def create(cls, shape, slots: int = 8, cursors: int = 0, isLive: bool = True) -> "FrameRing":
+        shape = tuple(int(v) for v in shape)
+        cursors = max(0, int(cursors))
+        shm = shared_memory.SharedMemory(create=True, size=cls._nbytes(shape, slots, cursors))
+        ring = cls(RingSpec(shm.name, shape, int(slots), cursors=cursors, isLive=isLive), shm, owner=True)
+        ring._seqs[:] = 0
+        ring._acks[:] = 0
+        return ring
+
+    @classmethod
+    def attach(cls, spec: RingSpec) -> "FrameRing":
+        try:
+            shm = shared_memory.SharedMemory(name=spec.name, track=False)  # Python 3.13+
+        except TypeError:
+            shm = shared_memory.SharedMemory(name=spec.name)
+        return cls(spec, shm, owner=False)
+
+    @property
+    def head(self) -> int:
+        return int(self._seqs[0])
+
+    # Writer
+
+    def publish(self, frame: np.ndarray, ts: Optional[float] = None) -> int:
+        seq = self.head + 1
+        slot = seq % self.spec.slots
+        self._seqs[1 + slot] = 0
+        np.copyto(self.frames[slot], frame)
+        self._times[slot] = time.monotonic() if ts is None else ts
+        self._seqs[1 + slot] = seq
+        self._seqs[0] = seq
+        return seq
+
+    def waitForReaders(self, stopEvent=None, pollS: float = 0.0005) -> bool:
+        """
+        For recorded sources: blocks until the next publish would not overwrite a frame some
+        cursor still needs. Returns False if stopEvent was set while waiting.
+        """
+        if self.spec.isLive or self.spec.cursors == 0:
+            return True
+        reused = self.head + 1 - self.spec.slots
+        while int(self._acks.min()) < reused:
+            if stopEvent is not None and stopEvent.is_set():
+                return False
+            time.sleep(pollS)
+        return True
+
+    # Readers
+
+    def ack(self, cursor: int, seq: int) -> None:
+        # Reader `cursor` is done with every frame up to `seq`
+        self._acks[cursor] = seq
+
+    def releaseCursor(self, cursor: int) -> None:
+        # A reader that is gone must not hold the writer back
+        self._acks[cursor] = np.iinfo(np.int64).max
+
+    def isCurrent(self, seq: int) -> bool:
+        return int(self._seqs[1 + seq % self.spec.slots]) == seq
+
+    def view(self, seq: int) -> Tuple[Optional[np.ndarray], float]:
+        """
+        Zero-copy view of frame `seq` and its capture time, or (None, 0.0) if it has been overwritten.
+        The view stays valid only while isCurrent(seq); copy it if it must outlive the slot.
+        """
+        slot = seq % self.spec.slots
+        if int(self._seqs[1 + slot]) != seq:
+            return None, 0.0
+        return self.frames[slot], float(self._times[slot])
+
+    def close(self):
+        # Drop our numpy views before closing the mapping
+        self._seqs = self._acks = self._times = self.frames = None
+        try:
+            self.shm.close()
+        except BufferError:
+            # A caller still holds a frame view; the mapping goes away with it
+            pass
+        if self.owner:
+            self.shm.unlink()
+
+
+class RingReader:
+
+    # Per-consumer cursor over a FrameRing.
+    #   "latest": always jump to the newest frame (display, detection)
+    #   "oldest": take every frame still in the ring, in order (recording)
+    # Frames overwritten before they were read are counted in `missed`. With a registered
+    # `cursor` the reader acks each frame when it asks for the next one, so a recorded
+    # source's writer waits for it (the view returned by next() stays valid until then).
+
+    def __init__(self, ring: FrameRing, policy: str = "latest", cursor: Optional[int] = None):
+        if policy not in SLOW_READER_POLICIES:
+            raise ValueError(f"Unknown slow reader policy: {policy}")
+        self.ring = ring
+        self.policy = policy
+        self.cursor = cursor
+        self.lastSeq = ring.head
+        self.missed = 0
+        # The writer waits for this reader, so every frame after lastSeq is still in the ring
+        self._heldBack = cursor is not None and not ring.spec.isLive
+
+    def next(self, timeoutS: float = 1.0, pollS: float = 0.001):
+        """
+        Returns (seq, frameView, captureTs), or None on timeout.
+        """
+        if self.cursor is not None:
+            self.ring.ack(self.cursor, self.lastSeq)
+        deadline = time.monotonic() + timeoutS
+        while True:
+            head = self.ring.head
+            if head > self.lastSeq:
+                if self.policy == "latest":
+                    seq = head
+                elif self._heldBack:
+                    seq = self.lastSeq + 1
+                else:
+                    # oldest frame that cannot be overwritten by the next publish
+                    seq = max(self.lastSeq + 1, head - self.ring.spec.slots + 2)
+                frame, ts = self.ring.view(seq)
+                if frame is not None:
+                    self.missed += seq - self.lastSeq - 1
+                    self.lastSeq = seq
+                    return seq, frame, ts
+                continue  # overwritten while we looked; re-read head
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(pollS)
+
+
+def _captureMain(
+    liveCfg: LiveFeedConfig, slots: int, paceFps: float, paceToSource: bool, readers: int,
+    specQueue, stopEvent, releaseEvent,
+):
+    # Capture process: LiveFeedController -> FrameRing. Owns (and finally unlinks) the shared memory.
+    controller = LiveFeedController(liveCfg)
+    try:
+        controller.startFeed()
+    except RuntimeError as e:
+        specQueue.put(e)
+        return
+
+    first = controller.readFrameRgb()
+    if first is None:
+        controller.stopFeed()
+        specQueue.put(RuntimeError("No frames from capture source"))
+        return
+
+    ring = FrameRing.create(first.shape, slots=slots, cursors=readers, isLive=controller.source.isLive)
+    ring.spec.fps = controller.getFps()
+    ring.spec.sourceName = controller.sourceName
+    specQueue.put(ring.spec)
+    ring.publish(first)
+
+    if paceToSource:
+        paceFps = ring.spec.fps
+
+    period = 1.0 / paceFps if paceFps > 0 else 0.0
+    nextAt = time.monotonic() + period
+    try:
+        while not stopEvent.is_set():
+            frame = controller.readFrameRgb()
+            if frame is None:
+                if controller.feedEnded:
+                    break
+                continue
+            if period:
+                delay = nextAt - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                nextAt = max(nextAt + period, time.monotonic())
+            if not ring.waitForReaders(stopEvent):
+                break
+            ring.publish(frame)
+    finally:
+        controller.stopFeed()
+        stopEvent.set()
+        # Consumers must detach before the block is unlinked
+        releaseEvent.wait(10.0)
+        ring.close()
+
+
+class FrameBus:
+
+    # Runs a capture process that fans frames out through a FrameRing to consumer processes.
+    #
+    #   bus = FrameBus(LiveFeedConfig(camera_index=0))
+    #   spec = bus.start()
+    #   bus.addConsumer(myConsumer, extraArg)   # myConsumer(spec, stopEvent, extraArg)
+    #   ...
+    #   bus.stop()
+
+    def __init__(
+        self,
+        liveCfg: LiveFeedConfig,
+        slots: int = 8,
+        paceFps: float = 0.0,
+        paceToSource: bool = False,
+        readers: int = 0,
+    ):
+        self.liveCfg = liveCfg
+        self.slots = slots
+        self.paceFps = paceFps
+        # Pace recorded sources to their own fps (like a camera) instead of a fixed paceFps
+        self.paceToSource = paceToSource
+        # Reader cursors 0..readers-1 that a recorded source waits for (see FrameRing)
+        self.readers = readers
+        self.ctx = mp.get_context("spawn")
+        self.stopEvent = self.ctx.Event()
+        self._releaseEvent = self.ctx.Event()
+        self.spec: Optional[RingSpec] = None
+        self._capture = None
+        self._consumers = []
+
+    def start(self, timeoutS: float = 15.0) -> RingSpec:
+        specQueue = self.ctx.Queue()
+        self._capture = self.ctx.Process(
+            target=_captureMain,
+            args=(
+                self.liveCfg, self.slots, self.paceFps, self.paceToSource, self.readers,
+                specQueue, self.stopEvent, self._releaseEvent,
+            ),
+            name="FrameBusCapture",
+            daemon=True,
+        )
+        self._capture.start()
+        try:
+            got = specQueue.get(timeout=timeoutS)
+        except queue.Empty:
+            self._capture.terminate()
+            raise RuntimeError("Capture process did not start in time")
+        if isinstance(got, Exception):
+            self._capture.join()
+            raise RuntimeError(str(got))
+        self.spec = got
+        return got
+
+    def addConsumer(self, target, *args, name: Optional[str] = None):
+        if self.spec is None:
+            raise RuntimeError("FrameBus.start() must be called first")
+        p = self.ctx.Process(target=target, args=(self.spec, self.stopEvent) + args, name=name, daemon=True)
+        p.start()
+        self._consumers.append(p)
+        return p
+
+    @property
+    def running(self) -> bool:
+        return not self.stopEvent.is_set()
+
+    def stop(self, timeoutS: float = 10.0):
+        self.stopEvent.set()
+        for p in self._consumers:
+            p.join(timeoutS)
+        self._releaseEvent.set()
+        if self._capture is not None:
+            self._capture.join(timeoutS)
+        self._consumers = []
+        self._capture = None
+
+
+class BusFeed:
+
+    # LiveFeedController stand-in that takes frames from a FrameBus: capture (decode, flip,
+    # colour conversion) runs in the bus's capture process and the caller detects on the
+    # shared-memory views. A live source is read with the "latest" policy; `frameSeq` is the
+    # capture sequence of the last frame read, so frames overwritten before they were read
+    # still advance the frame index and are counted in sourceDroppedFrames. A recorded source
+    # is read "oldest" on cursor 0, so capture waits for detection and every frame is seen.
+    # `readers` is the number of cursors capture waits for (BusClipRecorder takes cursor 1).
+
+    def __init__(self, cfg: LiveFeedConfig, paceToSource: bool = False, readers: int = 1, logFn=None):
+        self.cfg = cfg
+        self.logFn = logFn
+        self.bus = FrameBus(
+            cfg, slots=max(4, int(cfg.frame_bus_slots)), paceToSource=paceToSource, readers=max(1, int(readers))
+        )
+        self.ring: Optional[FrameRing] = None
+        self.reader: Optional[RingReader] = None
+        self.frameSeq = 0
+        self._missedAtStop = 0
+
+    def startFeed(self) -> None:
+        if self.ring is not None:
+            return
+        spec = self.bus.start()
+        self.ring = FrameRing.attach(spec)
+        # Start from the first published frame rather than whatever is newest by now
+        self.reader = RingReader(self.ring, policy="latest" if spec.isLive else "oldest", cursor=0)
+        self.reader.lastSeq = 0
+        self.frameSeq = 0
+        self._missedAtStop = 0
+
+    def stopFeed(self) -> None:
+        if self.ring is None:
+            return
+        self._missedAtStop = self.reader.missed
+        self.ring.releaseCursor(0)
+        self.reader = None
+        self.ring.close()
+        self.ring = None
+        self.bus.stop()
+
+    def readFrameRgb(self):
+        """
+        Returns a read-only view of the newest RGB frame, or None if none arrived in time.
+        """
+        if self.reader is None:
+            return None
+        item = self.reader.next(timeoutS=self.cfg.read_timeout_s)
+        if item is None:
+            return None
+        self.frameSeq, frame, _ = item
+        return frame
+
+    @property
+    def sourceName(self) -> str:
+        if self.ring is not None:
+            return self.ring.spec.sourceName
+        return self.cfg.source or f"camera {self.cfg.camera_index}"
+
+    @property
+    def feedEnded(self) -> bool:
+        # Capture stops the bus when its source ends; frames still in the ring are read first
+        return self.ring is None or (not self.bus.running and self.ring.head <= self.reader.lastSeq)
+
+    @property
+    def sourceDroppedFrames(self) -> int:
+        return self.reader.missed if self.reader is not None else self._missedAtStop
+
+    def skipFrames(self, n: int) -> None:
+        # The ring reader already jumps to the newest frame
+        pass
+
+    def getFps(self) -> float:
+        if self.ring is not None and self.ring.spec.fps > 0:
+            return float(self.ring.spec.fps)
+        return float(max(1, int(self.cfg.target_fps)))
+
+
+# BusFeed reads on cursor 0; the clip recorder process acks on this one
+CLIP_CURSOR = 1
+
+
+@dataclass
+class _BuilderState:
+    # What ClipRecorder reads from an EventBuilder, mirrored from the detecting process
+    active: bool = False
+    activeStartIdx: int = -1
+    events: List[Event] = field(default_factory=list)
+
+
+def _clipRecorderMain(spec: RingSpec, stopEvent, cfg, stateQueue, logQueue, doneIdx):
+    # Consumer process: records event clips from the ring, following the builder state the
+    # detecting process sends for every frame it has processed. Frames the detector skipped
+    # are recorded too while they are still in the ring. Acks on CLIP_CURSOR, so a recorded
+    # source does not overwrite frames it has not recorded yet.
+    ring = FrameRing.attach(spec)
+    recorder = makeClipRecorder(cfg, spec.fps, logFn=logQueue.put)
+    state = _BuilderState()
+    lastIdx = 0
+    missed = 0
+    try:
+        while True:
+            msg = stateQueue.get()
+            if msg is None:
+                break
+            kind, frameIdx, active, activeStartIdx, newEvents = msg
+            state.events.extend(newEvents)
+            state.active = active
+            state.activeStartIdx = activeStartIdx
+            if kind == "finish":
+                recorder.finish(state)
+                continue
+            # Anything older than one ring behind is gone already
+            oldest = max(lastIdx + 1, frameIdx - spec.slots + 1)
+            missed += oldest - (lastIdx + 1)
+            for idx in range(oldest, frameIdx + 1):
+                frame, _ = ring.view(idx)
+                if frame is None:
+                    missed += 1
+                    continue
+                # The slot is reused by capture, so the recorder keeps its own copy
+                recorder.onFrame(idx, frame.copy(), state)
+            lastIdx = frameIdx
+            ring.ack(CLIP_CURSOR, frameIdx)
+            doneIdx.value = frameIdx
+    finally:
+        ring.releaseCursor(CLIP_CURSOR)
+        recorder.close()
+        ring.close()
+        if missed:
+            logQueue.put(f"Clip recorder process missed {missed} frame(s) overwritten in the ring")
+
+
+class BusClipRecorder:
+
+    # ClipRecorder stand-in for the detecting process when frames come from a BusFeed: the
+    # recorder runs in a FrameBus consumer process and only the builder state crosses over
+    # (a small tuple per frame), so copying and encoding clips never competes for this
+    # process's GIL.
+
+    def __init__(self, cfg, feed: BusFeed, logFn=None):
+        if feed.bus.readers <= CLIP_CURSOR:
+            raise RuntimeError("BusFeed needs readers=2 when clips are recorded from the bus")
+        ctx = feed.bus.ctx
+        self.feed = feed
+        self.logFn = logFn
+        self._states = ctx.Queue()
+        self._logs = ctx.Queue()
+        self._doneIdx = ctx.Value("q", 0, lock=False)
+        self._sentIdx = 0
+        self._sentEvents = 0
+        self._closed = False
+        self._proc = feed.bus.addConsumer(
+            _clipRecorderMain, cfg, self._states, self._logs, self._doneIdx, name="FrameBusClipRecorder"
+        )
+
+    @property
+    def pendingFrames(self) -> int:
+        # Frames detection is ahead of the recorder process
+        return max(0, self._sentIdx - int(self._doneIdx.value))
+
+    def _send(self, kind: str, frameIdx: int, builder):
+        newEvents = builder.events[self._sentEvents:]
+        self._sentEvents = len(builder.events)
+        self._states.put((kind, frameIdx, builder.active, builder.activeStartIdx, newEvents))
+        self._forwardLogs()
+
+    def _forwardLogs(self):
+        try:
+            while True:
+                msg = self._logs.get_nowait()
+                if self.logFn:
+                    self.logFn(msg)
+        except queue.Empty:
+            pass
+
+    def onFrame(self, frameIdx: int, frameRgb: np.ndarray, builder):
+        # frameRgb is not sent; the recorder process reads frame `frameIdx` from the ring itself
+        if not self._closed and not self._proc.is_alive():
+            # Do not let a recorded source wait on a recorder that is gone
+            self._closed = True
+            if self.feed.ring is not None:
+                self.feed.ring.releaseCursor(CLIP_CURSOR)
+            self._forwardLogs()
+            if self.logFn:
+                self.logFn("Clip recorder process exited; no more clips this session")
+        if self._closed:
+            return
+        self._sentIdx = frameIdx
+        self._send("frame", frameIdx, builder)
+
+    def finish(self, builder):
+        if self._closed:
+            return
+        self._send("finish", self._sentIdx, builder)
+
+    def close(self, timeoutS: float = 10.0):
+        # Must run before the feed stops: the bus joins its consumers then
+        if self._closed:
+            return
+        self._closed = True
+        self._states.put(None)
+        # Keep draining its log queue: a process exits only once what it queued is consumed
+        deadline = time.monotonic() + timeoutS
+        while self._proc.is_alive() and time.monotonic() < deadline:
+            self._forwardLogs()
+            self._proc.join(0.05)
+        self._forwardLogs()
+
+
+def makeBusClipRecorder(cfg, feed: BusFeed, logFn=None) -> Optional[BusClipRecorder]:
+    if not cfg.record_live_clips:
+        return None
+    return BusClipRecorder(cfg, feed, logFn=logFn)
@@ -6,9 +6,10 @@ import queue
 from tkinter import ttk, filedialog, messagebox
 from pathlib import Path
 
-from config import AppConfig
-from processor import processVideo
-from live_feed_window import LiveFeedWindow
+from config import AppConfig, SENSITIVITY_PRESETS
+
+# processor / live_feed_window / event_review pull in cv2, NumPy and PIL; they are imported on
+# first use so the window appears without paying for them.
 
 
 class SmartCamGUI(tk.Tk):
@@ -21,6 +22,7 @@ class SmartCamGUI(tk.Tk):
         self.inputPath: Path | None = None
         self.cfg = AppConfig()
         self.liveWindow = None
+        self.reviewWindow = None
 
 
         # Background processing (keeps UI responsive on large videos)
@@ -43,6 +45,9 @@ class SmartCamGUI(tk.Tk):
         self.liveBtn = ttk.Button(topFrame, text="Live Feed", command=self.openLiveFeedWindow)
         self.liveBtn.pack(side="left", padx=8)
 
+        self.reviewBtn = ttk.Button(topFrame, text="Review Events", command=self.openEventReviewWindow)
+        self.reviewBtn.pack(side="left", padx=8)
+
 
         # Progress indicator
         self.progressValue = tk.DoubleVar(value=0.0)
@@ -59,7 +64,7 @@ class SmartCamGUI(tk.Tk):
         presetBox = ttk.Combobox(
             self.settingsFrame,
             textvariable=self.preset,
-            values=["Low sensitivity", "Balanced", "High sensitivity"],
+            values=list(SENSITIVITY_PRESETS),
             state="readonly",
             width=18,
         )
@@ -111,16 +116,9 @@ class SmartCamGUI(tk.Tk):
         self.settingsFrame.columnconfigure(1, weight=1)
 
         def applyPreset(*_):
-            presetName = self.preset.get()
-            if presetName == "Low sensitivity":
-                self.diffThreshold.set(40)
-                self.minArea.set(1500)
-            elif presetName == "High sensitivity":
-                self.diffThreshold.set(15)
-                self.minArea.set(400)
-            else:
-                self.diffThreshold.set(25)
-                self.minArea.set(800)
+            threshold, minArea = SENSITIVITY_PRESETS.get(self.preset.get(), SENSITIVITY_PRESETS["Balanced"])
+            self.diffThreshold.set(threshold)
+            self.minArea.set(minArea)
 
             self.updateSliderLabels()
 
@@ -206,6 +204,7 @@ class SmartCamGUI(tk.Tk):
             self.selectBtn.config(state="normal")
             self.outBtn.config(state="normal")
             self.liveBtn.config(state="normal")
+            self.reviewBtn.config(state="normal")
             self._completeProgress()
         except Exception:
             pass
@@ -227,9 +226,27 @@ class SmartCamGUI(tk.Tk):
             self.liveWindow.focus_force()
             return
 
+        from live_feed_window import LiveFeedWindow
+
         self.liveWindow = LiveFeedWindow(self, self.cfg, logFn=self.writeLog)
         self.liveWindow.setMotionParams(self.diffThreshold.get(), self.minArea.get())
 
+    #Event review (thumbnail grid from the last run's event index)
+    def openEventReviewWindow(self):
+        if self.reviewWindow is not None and self.reviewWindow.winfo_exists():
+            self.reviewWindow.reload()
+            self.reviewWindow.lift()
+            self.reviewWindow.focus_force()
+            return
+
+        from event_review import EventReviewWindow
+
+        self.reviewWindow = EventReviewWindow(self, self.cfg, logFn=self.writeLog)
+
+    def _refreshReviewWindow(self):
+        if self.reviewWindow is not None and self.reviewWindow.winfo_exists():
+            self.reviewWindow.reload()
+
     #Video file processing
     def pickVideo(self):
         path = filedialog.askopenfilename(
@@ -262,9 +279,14 @@ class SmartCamGUI(tk.Tk):
             self.selectBtn.config(state="disabled")
             self.outBtn.config(state="disabled")
             self.liveBtn.config(state="disabled")
+            self.reviewBtn.config(state="disabled")
         except Exception:
             pass
 
+        # The review window holds highlight.mp4 open; let go of it before it is rewritten
+        if self.reviewWindow is not None and self.reviewWindow.winfo_exists():
+            self.reviewWindow.reload()
+
         # Start a determinate-style (fake) progress bar while processing runs in background
         self._startFakeProgress()
 
@@ -275,12 +297,15 @@ class SmartCamGUI(tk.Tk):
 
         def worker():
             try:
+                from processor import processVideo
+
                 res = processVideo(
                     self.inputPath,
                     self.cfg,
                     logFn=lambda m: self.logQueue.put(m),
                 )
                 self.logQueue.put(f"Done. Events: {res.eventCount}")
+                self.after(0, self._refreshReviewWindow)
                 self.after(
                     0,
                     lambda: messagebox.showinfo(
@@ -0,0 +1,325 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import signal
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from activity import ActivitySummary, makeActivitySummary
+from clip_recorder import ClipRecorder, makeClipRecorder
+from config import AppConfig
+from event_store import EventSink, openEventSink
+from events import EventBuilder, EVENTS_CSV_HEADER, chainCallbacks, eventCsvRow
+from frame_bus import BusFeed, makeBusClipRecorder
+from live_feed import DeadlineScheduler, DetectionGovernor, LiveFeedController, LiveFeedConfig, makeGovernor
+from live_motion import LiveMotionDetector, LiveMotionConfig
+from notifier import WebhookNotifier, makeNotifier
+from roi import loadRegions, regionFor
+from tracker import applyTracker, makeTracker
+from video_source import CAMERA_PREFIX, STREAM_PREFIXES
+
+
+class HeadlessMonitor:
+
+    # Runs the live pipeline (capture -> detection -> events) without any UI.
+    # Events are appended to the CSV as soon as they close, so a killed process
+    # loses at most the event that was still open.
+
+    def __init__(
+        self,
+        cfg: AppConfig,
+        liveCfg: LiveFeedConfig,
+        motionCfg: LiveMotionConfig,
+        logFn=None,
+        statsIntervalS: float = 10.0,
+        throttle: bool = False,
+    ):
+        self.cfg = cfg
+        self.liveCfg = liveCfg
+        self.motionCfg = motionCfg
+        self.logFn = logFn
+        self.statsIntervalS = statsIntervalS
+        # Pace a recorded source to its own fps with a DeadlineScheduler, dropping frames when
+        # behind like a camera would; otherwise it is read as fast as detection allows
+        self.throttle = throttle
+        self.scheduler: Optional[DeadlineScheduler] = None
+
+        # With use_frame_bus, capture runs in its own process (pacing there) and clips are
+        # recorded in another; only detection and events stay in this one
+        self.useBus = liveCfg.use_frame_bus
+        if self.useBus:
+            self.controller = BusFeed(
+                liveCfg, paceToSource=throttle, readers=2 if cfg.record_live_clips else 1, logFn=logFn
+            )
+        else:
+            self.controller = LiveFeedController(liveCfg, logFn=logFn)
+        self.detector = LiveMotionDetector(motionCfg)
+        self.tracker = makeTracker(cfg)
+        self.builder: Optional[EventBuilder] = None
+        self.recorder: Optional[ClipRecorder] = None
+        self.sink: Optional[EventSink] = None
+        self.notifier: Optional[WebhookNotifier] = None
+        self.activity: Optional[ActivitySummary] = None
+        self.governor: Optional[DetectionGovernor] = None
+        self.eventsCsvPath = Path(cfg.output_dir) / cfg.live_events_csv_name
+
+        self.frameIdx = 0
+        self.fps = 0.0
+        self.elapsedS = 0.0
+        self._stopRequested = False
+
+    @property
+    def droppedFrames(self) -> int:
+        scheduled = self.scheduler.stats.droppedFrames if self.scheduler is not None else 0
+        return scheduled + self.controller.sourceDroppedFrames
+
+    def writeLog(self, msg: str):
+        if self.logFn:
+            self.logFn(msg)
+
+    def stop(self):
+        # Safe to call from a signal handler; the loop exits after the current frame
+        self._stopRequested = True
+
+    def run(self, maxFrames: Optional[int] = None) -> int:
+        self.controller.startFeed()
+        self.detector.setRegion(regionFor(self.cfg, self.controller.sourceName))
+        if self.tracker is not None:
+            self.tracker.reset()
+        fps = self.fps = self.controller.getFps()
+        self.sink = openEventSink(self.cfg, self.controller.sourceName, fps)
+        self.notifier = makeNotifier(self.cfg, self.controller.sourceName, fps, logFn=self.logFn)
+        self.builder = EventBuilder(
+            self.cfg.pre_roll_frames,
+            self.cfg.post_roll_frames,
+            self.cfg.min_event_frames,
+            onEvent=chainCallbacks(self.sink, self.notifier),
+            onEventStart=self.notifier.eventStarted if self.notifier is not None else None,
+        )
+        self.frameIdx = 0
+        self._stopRequested = False
+        if self.useBus:
+            self.recorder = makeBusClipRecorder(self.cfg, self.controller, logFn=self.logFn)
+        else:
+            self.recorder = makeClipRecorder(self.cfg, fps, logFn=self.logFn)
+        self.activity = None
+        self.detector.setScale(1.0)
+        self.governor = makeGovernor(self.liveCfg, fps, logFn=self.logFn)
+        self.scheduler = DeadlineScheduler(fps) if self.throttle and not self.useBus else None
+        # Last detection result, held over frames the governor skips
+        held = (False, [], None, 0.0)
+        lastDetectIdx = 0
+        heatmapBackground = None
+
+        self.eventsCsvPath.parent.mkdir(parents=True, exist_ok=True)
+        written = 0
+
+        # Stats for the current reporting window
+        windowStart = time.perf_counter()
+        windowFrames = 0
+        latencySum = 0.0
+        latencyMax = 0.0
+
+        self.writeLog(f"Headless monitor started: {self.controller.sourceName} | fps={fps:.2f}")
+        runStart = time.perf_counter()
+        if self.scheduler is not None:
+            self.scheduler.start()
+
+        try:
+            with open(self.eventsCsvPath, "w", newline="", encoding="utf-8") as f:
+                w = csv.writer(f)
+                w.writerow(EVENTS_CSV_HEADER)
+                f.flush()
+
+                while not self._stopRequested:
+                    if maxFrames is not None and self.frameIdx >= maxFrames:
+                        break
+
+                    t0 = time.perf_counter()
+                    frameRgb = self.controller.readFrameRgb()
+                    if frameRgb is None:
+                        if self.controller.feedEnded:
+                            self.writeLog("Source ended or frame read failed.")
+                            break
+                        # Source is reconnecting; keep checking for a stop request
+                        if self.scheduler is not None:
+                            self.scheduler.frameDone(t0)
+                        continue
+
+                    # Bus frames keep their capture sequence, so frames the ring overwrote count
+                    self.frameIdx = self.controller.frameSeq if self.useBus else self.frameIdx + 1
+                    t1 = time.perf_counter()
+                    if self.useBus:
+                        # Reading only waits for capture's next publish; that is not latency
+                        t0 = t1
+                    if self.activity is None and self.cfg.activity_enabled:
+                        frameH, frameW = frameRgb.shape[:2]
+                        self.activity = makeActivitySummary(self.cfg, frameW, frameH, fps, baseTs=time.time())
+                        heatmapBackground = frameRgb[:, :, ::-1].copy()
+                    if self.governor is None or self.governor.shouldDetect():
+                        res = self.detector.update(frameRgb, elapsedFrames=self.frameIdx - lastDetectIdx)
+                        lastDetectIdx = self.frameIdx
+                        motion, boxes, trackBoxes = applyTracker(self.tracker, self.frameIdx, res.hasMotion, res.boxes)
+                        held = (motion, boxes, trackBoxes, res.motionScore)
+                        if self.activity is not None:
+                            self.activity.update(self.frameIdx, motion, res.motionScore, res.mask, res.offset, res.maskScale)
+                    else:
+                        # Skipped frames still advance the builder under their own index
+                        motion, boxes, trackBoxes, score = held
+                        if self.activity is not None:
+                            self.activity.update(self.frameIdx, motion, score)
+                    self.builder.update(self.frameIdx, motion, boxes, trackBoxes, score=held[3])
+                    if self.recorder is not None:
+                        self.recorder.onFrame(self.frameIdx, frameRgb, self.builder)
+
+                    while written < len(self.builder.events):
+                        ev = self.builder.events[written]
+                        w.writerow(eventCsvRow(ev, fps))
+                        f.flush()
+                        written += 1
+                        self.writeLog(f"Event {ev.id}: frames {ev.startIdx}-{ev.endIdx}")
+
+                    now = time.perf_counter()
+                    if self.governor is not None and self.governor.frameDone(1000.0 * (now - t1)):
+                        self.detector.setScale(self.governor.level.scale)
+                    latency = now - t0
+                    latencySum += latency
+                    latencyMax = max(latencyMax, latency)
+                    windowFrames += 1
+
+                    now = time.perf_counter()
+                    if now - windowStart >= self.statsIntervalS:
+                        elapsed = now - windowStart
+                        self.writeLog(
+                            f"frames={self.frameIdx} | fps={windowFrames / elapsed:.1f} | dropped={self.droppedFrames} | "
+                            f"latency avg={1000 * latencySum / windowFrames:.1f}ms max={1000 * latencyMax:.1f}ms | "
+                            f"events={len(self.builder.events)}"
+                            + (f" | clip queue={self.recorder.pendingFrames}" if self.recorder is not None else "")
+                            + (f" | {self.notifier.describeStats()}" if self.notifier is not None else "")
+                            + (f" | detection {self.governor.describe()}" if self.governor is not None else "")
+                        )
+                        windowStart = now
+                        windowFrames = 0
+                        latencySum = 0.0
+                        latencyMax = 0.0
+
+                    if self.scheduler is not None:
+                        delayMs, dropped = self.scheduler.frameDone(t0)
+                        if dropped:
+                            # Keep frame indices on the source timeline, as the live window does
+                            self.controller.skipFrames(dropped)
+                            self.frameIdx += dropped
+                        if delayMs:
+                            time.sleep(delayMs / 1000.0)
+
+                self.elapsedS = time.perf_counter() - runStart
+
+                # Flush the event that was still open when we stopped
+                self.builder.finalize(self.frameIdx)
+                if self.recorder is not None:
+                    self.recorder.finish(self.builder)
+                for ev in self.builder.events[written:]:
+                    w.writerow(eventCsvRow(ev, fps))
+                    written += 1
+        finally:
+            # Recorder first: a bus recorder is a consumer the bus joins when the feed stops
+            if self.recorder is not None:
+                self.recorder.close()
+            self.controller.stopFeed()
+            if self.sink is not None:
+                self.sink.close()
+            if self.notifier is not None:
+                self.notifier.close()
+                self.writeLog(f"Webhooks: {self.notifier.describeStats()}")
+
+        self.writeLog(f"Headless monitor stopped after {self.frameIdx} frames ({self.droppedFrames} dropped). Events: {written}")
+        if self.governor is not None and self.governor.changes:
+            self.writeLog(f"Detection level changes: {self.governor.changes} (ended at {self.governor.describe()})")
+        self.writeLog(f"Saved live events CSV: {self.eventsCsvPath}")
+        if self.activity is not None:
+            outputDir = Path(self.cfg.output_dir)
+            self.writeLog(f"Saved heatmap: {self.activity.saveHeatmap(outputDir / self.cfg.live_heatmap_name, heatmapBackground)}")
+            self.writeLog(f"Saved activity timeline: {self.activity.saveTimeline(outputDir / self.cfg.live_timeline_name)}")
+        return written
+
+
+_printLock = threading.Lock()
+
+
+def printLog(msg: str):
+    # Called from the clip writer thread too
+    with _printLock:
+        print(f"{time.strftime('%Y-%m-%d %H:%M:%S')} {msg}", flush=True)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Headless live motion monitoring (no display).")
+    parser.add_argument("--camera", type=int, default=0, help="camera index (default 0)")
+    parser.add_argument("--source", help="video file, frame directory, stream URL or camera:N to use instead of --camera")
+    parser.add_argument("--output-dir", type=Path, help="override the output folder")
+    parser.add_argument("--threshold", type=int, default=25, help="motion diff threshold (0-255)")
+    parser.add_argument("--min-area", type=int, default=800, help="minimum contour area in px^2")
+    parser.add_argument("--stats-interval", type=float, default=10.0, help="seconds between fps/latency logs")
+    parser.add_argument("--regions", type=Path, help="JSON file with ROI / exclusion polygons per source")
+    parser.add_argument("--track", action="store_true", help="track blobs across frames and ignore short-lived ones")
+    parser.add_argument("--event-db", action="store_true", help="also append events to the SQLite event database")
+    parser.add_argument("--webhook", action="append", default=[], metavar="URL", help="POST event start/end notifications here (repeatable)")
+    parser.add_argument(
+        "--throttle",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help="pace --source files to their fps, dropping frames when behind (default: on for files, off otherwise)",
+    )
+    parser.add_argument("--frame-bus", action="store_true", help="capture and record clips in separate processes (shared-memory ring)")
+    parser.add_argument("--no-adaptive", action="store_true", help="always detect at full resolution on every frame")
+    parser.add_argument("--max-frames", type=int, help="stop after this many frames")
+    args = parser.parse_args(argv)
+
+    cfg = AppConfig()
+    if args.output_dir:
+        cfg.output_dir = args.output_dir.expanduser()
+    cfg.event_db_enabled = cfg.event_db_enabled or args.event_db
+    cfg.tracking_enabled = cfg.tracking_enabled or args.track
+    cfg.webhook_urls = cfg.webhook_urls + args.webhook
+    if args.regions:
+        cfg.regions = loadRegions(args.regions)
+
+    throttle = args.throttle
+    if throttle is None:
+        # A file or frame directory stands in for a camera, so it plays at camera rate
+        throttle = bool(args.source) and not args.source.lower().startswith(STREAM_PREFIXES + (CAMERA_PREFIX,))
+
+    monitor = HeadlessMonitor(
+        cfg,
+        LiveFeedConfig(
+            camera_index=args.camera,
+            source=args.source,
+            adaptive_detection=not args.no_adaptive,
+            use_frame_bus=args.frame_bus,
+        ),
+        LiveMotionConfig(diff_threshold=args.threshold, min_contour_area=args.min_area),
+        logFn=printLog,
+        statsIntervalS=args.stats_interval,
+        throttle=throttle,
+    )
+
+    def onSignal(signum, _frame):
+        printLog(f"Received signal {signum}, shutting down.")
+        monitor.stop()
+
+    signal.signal(signal.SIGTERM, onSignal)
+    signal.signal(signal.SIGINT, onSignal)
+
+    try:
+        monitor.run(maxFrames=args.max_frames)
+    except RuntimeError as e:
+        printLog(f"ERROR: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,36 +1,218 @@
 from __future__ import annotations
 
+from collections import deque
 from dataclasses import dataclass
-from typing import Optional
-import sys
+from typing import Optional, Tuple
+import time
 
 import cv2
 
+from video_source import VideoSource, makeSource
+
 
 @dataclass
 class LiveFeedConfig:
     camera_index: int = 0
     target_fps: int = 25
     flip_horizontal: bool = False
+    source: Optional[str] = None       # file, frame directory or stream URL instead of the camera
+    prefetch_frames: int = 2           # background decode buffer (0 = read inline)
+    read_timeout_s: float = 1.0        # max wait for a prefetched frame (e.g. while reconnecting)
+    startup_timeout_s: float = 5.0     # max wait for the first frame (cameras settling auto-exposure)
+    adaptive_detection: bool = True    # lower detection scale/rate when frames run over budget
+    frame_budget_share: float = 0.8    # share of the frame period processing may use
+    use_frame_bus: bool = False        # capture and clip recording in their own processes (headless)
+    frame_bus_slots: int = 16          # shared-memory ring size when use_frame_bus is set
+
+
+@dataclass
+class FrameStats:
+    achievedFps: float = 0.0
+    droppedFrames: int = 0
+    procMsLast: float = 0.0
+    procMsAvg: float = 0.0
+
+
+class DeadlineScheduler:
+
+    # Schedules frames against absolute deadlines (start + n * period) instead of
+    # waiting a fixed delay after each frame, so processing time is absorbed into
+    # the period. When more than a whole period behind, the missed slots are
+    # dropped rather than queued up.
+
+    def __init__(self, targetFps: float, statsWindowS: float = 2.0):
+        self.period = 1.0 / max(1.0, float(targetFps))
+        self.statsWindowS = statsWindowS
+        self.stats = FrameStats()
+        self._deadline = 0.0
+        self._doneTimes: deque = deque()
+
+    def start(self) -> None:
+        self._deadline = time.perf_counter()
+        self.stats = FrameStats()
+        self._doneTimes.clear()
+
+    def frameDone(self, startedAt: float) -> Tuple[int, int]:
+        """
+        Call after a frame has been processed, with the perf_counter() taken when it started.
+        Returns (delayMs until the next frame, number of frame slots dropped).
+        """
+        now = time.perf_counter()
+        procMs = 1000.0 * (now - startedAt)
+        self.stats.procMsLast = procMs
+        self.stats.procMsAvg = procMs if self.stats.procMsAvg == 0.0 else 0.9 * self.stats.procMsAvg + 0.1 * procMs
+
+        self._doneTimes.append(now)
+        while self._doneTimes and now - self._doneTimes[0] > self.statsWindowS:
+            self._doneTimes.popleft()
+        if len(self._doneTimes) > 1:
+            self.stats.achievedFps = (len(self._doneTimes) - 1) / (self._doneTimes[-1] - self._doneTimes[0])
+
+        self._deadline += self.period
+        dropped = 0
+        if now - self._deadline >= self.period:
+            dropped = int((now - self._deadline) // self.period)
+            self._deadline += dropped * self.period
+            self.stats.droppedFrames += dropped
+
+        delayMs = max(0, int(round(1000.0 * (self._deadline - now))))
+        return delayMs, dropped
+
+
+@dataclass(frozen=True)
+class DetectionLevel:
+    scale: float        # detection resolution relative to the frame
+    detectEvery: int    # run detection on every n-th displayed frame
+
+
+class DetectionGovernor:
+
+    # Watches per-frame processing time against the frame budget and gives up detection
+    # resolution first, then detection rate, to keep up: after `downAfter` frames with the
+    # smoothed time over budget it steps one level down, after `upAfter` frames comfortably
+    # under budget (below `headroom` * budget) one level back up. The asymmetric counts are
+    # the hysteresis that keeps it from flapping; a step up that has to be undone soon after
+    # doubles the wait before the next one (up to 8x). Every change is logged.
+
+    def __init__(
+        self,
+        targetFps: float,
+        budgetShare: float = 0.8,
+        scales: Tuple[float, ...] = (1.0, 0.75, 0.5),
+        maxDetectEvery: int = 3,
+        downAfter: int = 10,
+        upAfter: int = 75,
+        headroom: float = 0.6,
+        logFn=None,
+    ):
+        self.budgetMs = 1000.0 * max(0.05, float(budgetShare)) / max(1.0, float(targetFps))
+        self.levels = [DetectionLevel(s, 1) for s in scales]
+        self.levels += [DetectionLevel(scales[-1], n) for n in range(2, max(1, int(maxDetectEvery)) + 1)]
+        self.downAfter = max(1, int(downAfter))
+        self.upAfter = max(1, int(upAfter))
+        self.headroom = headroom
+        self.logFn = logFn
+        self.levelIdx = 0
+        self.changes = 0
+        self._emaMs = 0.0
+        self._over = 0
+        self._under = 0
+        self._sinceDetect = 0
+        self._upWait = self.upAfter
+        self._sinceChange = 0
+        self._lastDelta = 0
+
+    @property
+    def level(self) -> DetectionLevel:
+        return self.levels[self.levelIdx]
+
+    def shouldDetect(self) -> bool:
+        # Call once per displayed frame
+        self._sinceDetect += 1
+        if self._sinceDetect >= self.level.detectEvery:
+            self._sinceDetect = 0
+            return True
+        return False
+
+    def frameDone(self, procMs: float) -> bool:
+        """
+        Call with the frame's processing time (excluding the wait for the frame itself).
+        Returns True when the level changed.
+        """
+        self._sinceChange += 1
+        self._emaMs = procMs if self._emaMs == 0.0 else 0.8 * self._emaMs + 0.2 * procMs
+        if self._emaMs > self.budgetMs:
+            self._over += 1
+            self._under = 0
+        elif self._emaMs < self.headroom * self.budgetMs:
+            self._under += 1
+            self._over = 0
+        else:
+            self._over = self._under = 0
+
+        if self._over >= self.downAfter and self.levelIdx < len(self.levels) - 1:
+            self._step(1)
+            return True
+        if self._under >= self._upWait and self.levelIdx > 0:
+            self._step(-1)
+            return True
+        return False
+
+    def describe(self) -> str:
+        lvl = self.level
+        return f"scale {lvl.scale:.2f}, detect 1/{lvl.detectEvery}"
+
+    def _step(self, delta: int) -> None:
+        emaMs = self._emaMs
+        if delta > 0 and self._lastDelta < 0 and self._sinceChange < 2 * self._upWait:
+            self._upWait = min(8 * self.upAfter, 2 * self._upWait)
+        elif delta > 0 and self._sinceChange >= 8 * self.upAfter:
+            self._upWait = self.upAfter
+        self._lastDelta = delta
+        self._sinceChange = 0
+        self.levelIdx += delta
+        self.changes += 1
+        # The smoothed time still reflects the old level
+        self._emaMs = 0.0
+        self._over = self._under = 0
+        self._sinceDetect = 0
+        if self.logFn:
+            self.logFn(
+                f"Detection {'down' if delta > 0 else 'up'} to {self.describe()} "
+                f"(processing {emaMs:.1f}ms vs budget {self.budgetMs:.1f}ms)"
+            )
+
+
+def makeGovernor(cfg: LiveFeedConfig, targetFps: float, logFn=None) -> Optional[DetectionGovernor]:
+    if not cfg.adaptive_detection:
+        return None
+    return DetectionGovernor(targetFps, budgetShare=cfg.frame_budget_share, logFn=logFn)
 
 
 class LiveFeedController:
-    def __init__(self, cfg: LiveFeedConfig):
+    def __init__(self, cfg: LiveFeedConfig, logFn=None):
         self.cfg = cfg
-        self.cap: Optional[cv2.VideoCapture] = None
+        self.logFn = logFn
+        self.source: Optional[VideoSource] = None
 
     def startFeed(self) -> None:
-        if self.cap is not None:
+        if self.source is not None:
             return
 
-        # macOS: prefer AVFoundation backend
-        if sys.platform == "darwin":
-            cap = cv2.VideoCapture(self.cfg.camera_index, cv2.CAP_AVFOUNDATION)
-        else:
-            cap = cv2.VideoCapture(self.cfg.camera_index)
-
-        if not cap.isOpened():
-            cap.release()
+        spec = self.cfg.source if self.cfg.source else self.cfg.camera_index
+        source = makeSource(
+            spec,
+            prefetch=self.cfg.prefetch_frames,
+            fps=self.cfg.target_fps,
+            readTimeoutS=self.cfg.read_timeout_s,
+            logFn=self.logFn,
+        )
+        try:
+            source.open()
+        except RuntimeError:
+            source.release()
+            if self.cfg.source:
+                raise RuntimeError(f"Could not open video source: {self.cfg.source}")
             raise RuntimeError(
                 "Could not open camera.\n\n"
                 "macOS: System Settings → Privacy & Security → Camera\n"
@@ -38,30 +220,34 @@ class LiveFeedController:
                 "Also close Zoom/Teams/Chrome tabs that may be using the camera."
             )
 
-        # Force a first frame read (helps surface issues early)
-        ok, frame = cap.read()
+        # Force a first frame read (helps surface issues early). read_timeout_s may be short for the
+        # steady-state loop, so keep trying until the startup timeout
+        deadline = time.perf_counter() + max(0.0, self.cfg.startup_timeout_s)
+        ok, frame = source.read()
+        while (not ok or frame is None) and not source.finished and time.perf_counter() < deadline:
+            ok, frame = source.read()
         if not ok or frame is None:
-            cap.release()
+            source.release()
             raise RuntimeError(
                 "Camera opened but no frames were received.\n\n"
                 "This is usually permissions or another app using the camera."
             )
 
-        self.cap = cap
+        self.source = source
 
     def stopFeed(self) -> None:
-        if self.cap is not None:
-            self.cap.release()
-            self.cap = None
+        if self.source is not None:
+            self.source.release()
+            self.source = None
 
     def readFrameRgb(self):
         """
         Returns an RGB frame as a numpy array (H, W, 3), or None if unavailable.
         """
-        if self.cap is None:
+        if self.source is None:
             return None
 
-        ok, frame = self.cap.read()
+        ok, frame = self.source.read()
         if not ok or frame is None:
             return None
 
@@ -72,7 +258,30 @@ class LiveFeedController:
         frameRgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
         return frameRgb
 
-    def getDelayMs(self) -> int:
-        fps = max(1, int(self.cfg.target_fps))
-        return int(1000 / fps)
+    @property
+    def sourceName(self) -> str:
+        if self.source is not None:
+            return self.source.describe()
+        return self.cfg.source or f"camera {self.cfg.camera_index}"
+
+    @property
+    def feedEnded(self) -> bool:
+        # False while a live source is only stalled (reconnecting)
+        return self.source is None or self.source.finished
+
+    @property
+    def sourceDroppedFrames(self) -> int:
+        # Live frames the prefetch buffer replaced before they were read
+        return int(getattr(self.source, "droppedFrames", 0)) if self.source is not None else 0
+
+    def skipFrames(self, n: int) -> None:
+        # Only recorded sources need explicit skipping; live prefetch already keeps the newest frame
+        if self.source is None or self.source.isLive:
+            return
+        self.source.skip(n)
 
+    def getFps(self) -> float:
+        # Recorded sources carry their own rate; cameras often report 0 or a bogus value
+        if self.source is not None and not self.source.isLive and self.source.meta.fps > 0:
+            return float(self.source.meta.fps)
+        return float(max(1, int(self.cfg.target_fps)))
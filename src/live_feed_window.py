@@ -3,15 +3,24 @@ from __future__ import annotations
 import tkinter as tk
 from tkinter import ttk, messagebox
 import csv
+import queue
 from pathlib import Path
 from PIL import Image, ImageTk
 
-from live_feed import LiveFeedController, LiveFeedConfig
+import time
+
+from live_feed import LiveFeedController, LiveFeedConfig, DeadlineScheduler, makeGovernor
 
 import cv2
 from live_motion import LiveMotionDetector, LiveMotionConfig
-from events import EventBuilder
+from events import EventBuilder, EVENTS_CSV_HEADER, chainCallbacks, eventCsvRow
 from config import AppConfig
+from clip_recorder import makeClipRecorder
+from roi import regionFor
+from tracker import applyTracker, makeTracker
+from event_store import openEventSink
+from notifier import makeNotifier
+from activity import makeActivitySummary
 
 
 class LiveFeedWindow(tk.Toplevel):
@@ -21,22 +30,40 @@ class LiveFeedWindow(tk.Toplevel):
         self.geometry("900x600")
 
         self.logFn = logFn
+        # Capture, clip writer and notifier threads log here; calling Tk from them would block
+        # while the Tk thread joins them in stopLiveFeed
+        self.logQueue = queue.Queue()
+        self._logDrainId = self.after(100, self._drainLogQueue)
         self.cfg = cfg
         self.outputDir = Path(self.cfg.output_dir)
 
         # Controller
-        self.liveCfg = LiveFeedConfig(camera_index=0, target_fps=25, flip_horizontal=False)
-        self.liveController = LiveFeedController(self.liveCfg)
+        # Short read timeout so a reconnecting camera never freezes the Tk loop
+        self.liveCfg = LiveFeedConfig(camera_index=0, target_fps=25, flip_horizontal=False, read_timeout_s=0.05)
+        self.liveController = LiveFeedController(self.liveCfg, logFn=self.logQueue.put)
+        self.scheduler = DeadlineScheduler(self.liveCfg.target_fps)
+        self.statsLogIntervalS = 10.0
+        self._lastStatsLog = 0.0
 
         # Motion detector (defaults syncs from main GUI settings)
         self.motionCfg = LiveMotionConfig(diff_threshold=25, min_contour_area=800)
         self.motionDetector = LiveMotionDetector(self.motionCfg)
         self.motionEnabled = tk.BooleanVar(value=True)
+        self.tracker = makeTracker(self.cfg)
+        self.governor = None
+        # Last detection result (hasMotion, boxes, trackBoxes, score), held over frames the governor skips
+        self._heldMotion = (False, [], None, 0.0)
+        self._lastDetectIdx = 0
 
         self.liveEventBuilder: EventBuilder | None = None
         self.liveFrameIdx = 0
         self.liveSessionActive = False
         self.liveEventsCsvPath: Path | None = None
+        self.clipRecorder = None
+        self.eventSink = None
+        self.notifier = None
+        self.activity = None
+        self.heatmapBackground = None
 
         self.liveAfterId = None
         self.liveTkImage = None
@@ -67,6 +94,11 @@ class LiveFeedWindow(tk.Toplevel):
         motionChk = ttk.Checkbutton(topBar, text="Motion overlay", variable=self.motionEnabled)
         motionChk.pack(side="right", padx=8)
 
+        # fps / dropped / processing time overlay
+        self.statsOverlay = tk.BooleanVar(value=False)
+        statsChk = ttk.Checkbutton(topBar, text="Stats overlay", variable=self.statsOverlay)
+        statsChk.pack(side="right", padx=8)
+
         # Close behaviour
         self.protocol("WM_DELETE_WINDOW", self.onClose)
 
@@ -78,6 +110,17 @@ class LiveFeedWindow(tk.Toplevel):
         if self.logFn:
             self.logFn(msg)
 
+    def _flushLogQueue(self):
+        try:
+            while True:
+                self.writeLog(self.logQueue.get_nowait())
+        except queue.Empty:
+            pass
+
+    def _drainLogQueue(self):
+        self._flushLogQueue()
+        self._logDrainId = self.after(100, self._drainLogQueue)
+
     def applyFlip(self):
         self.liveCfg.flip_horizontal = bool(self.flipVar.get())
 
@@ -92,22 +135,48 @@ class LiveFeedWindow(tk.Toplevel):
             self.writeLog(f"ERROR (Live Feed): {e}")
             return
 
-        self.motionDetector.reset()
+        self.motionDetector.setRegion(regionFor(self.cfg, self.liveController.sourceName))
+        if self.tracker is not None:
+            self.tracker.reset()
+        self.eventSink = openEventSink(self.cfg, self.liveController.sourceName, self.liveController.getFps())
+        # Notifier logs from its own thread, so hop back onto the Tk loop
+        self.notifier = makeNotifier(
+            self.cfg,
+            self.liveController.sourceName,
+            self.liveController.getFps(),
+            logFn=self.logQueue.put,
+        )
         self.liveEventBuilder = EventBuilder(
             self.cfg.pre_roll_frames,
             self.cfg.post_roll_frames,
             self.cfg.min_event_frames,
+            onEvent=chainCallbacks(self.eventSink, self.notifier),
+            onEventStart=self.notifier.eventStarted if self.notifier is not None else None,
         )
         self.liveFrameIdx = 0
+        self.motionDetector.setScale(1.0)
+        self.governor = makeGovernor(self.liveCfg, self.liveController.getFps(), logFn=self.writeLog)
+        self._heldMotion = (False, [], None, 0.0)
+        self._lastDetectIdx = 0
         self.liveSessionActive = True
+        self.activity = None
+        self.heatmapBackground = None
         self.outputDir.mkdir(parents=True, exist_ok=True)
         self.liveEventsCsvPath = self.outputDir / self.cfg.live_events_csv_name
+        # Clip writer logs from its own thread, so hop back onto the Tk loop
+        self.clipRecorder = makeClipRecorder(
+            self.cfg,
+            self.liveController.getFps(),
+            logFn=self.logQueue.put,
+        )
 
         self.liveStatus.set("Running")
         self.startBtn.config(state="disabled")
         self.stopBtn.config(state="normal")
         self.writeLog("Live feed started.")
-        self._scheduleNextFrame()
+        self.scheduler.start()
+        self._lastStatsLog = time.perf_counter()
+        self._scheduleNextFrame(0)
 
     def stopLiveFeed(self):
         if self.liveAfterId is not None:
@@ -118,6 +187,8 @@ class LiveFeedWindow(tk.Toplevel):
             self.liveAfterId = None
 
         self.liveController.stopFeed()
+        if self.liveSessionActive:
+            self._logStats()
         self._finalizeLiveEvents()
         self.liveStatus.set("Stopped")
         self.startBtn.config(state="normal")
@@ -131,28 +202,49 @@ class LiveFeedWindow(tk.Toplevel):
             return
 
         self.liveEventBuilder.finalize(self.liveFrameIdx)
+        if self.clipRecorder is not None:
+            self.clipRecorder.finish(self.liveEventBuilder)
+            # Short wait like the notifier below; a writer still busy after it is abandoned
+            self.clipRecorder.close(timeoutS=1.0)
+            self.clipRecorder = None
+        if self.eventSink is not None:
+            self.eventSink.close()
+            self.eventSink = None
+        if self.notifier is not None:
+            # Short flush window; the Tk loop is blocked while it waits
+            self.notifier.close(timeoutS=1.0)
+            self.writeLog(f"Webhooks: {self.notifier.describeStats()}")
+            self.notifier = None
         fps = max(1, float(self.liveCfg.target_fps))
 
         with open(self.liveEventsCsvPath, "w", newline="", encoding="utf-8") as f:
             w = csv.writer(f)
-            w.writerow(["event_id", "start_frame", "end_frame", "start_s", "end_s", "duration_s", "bbox_x", "bbox_y", "bbox_w", "bbox_h"])
+            w.writerow(EVENTS_CSV_HEADER)
             for ev in self.liveEventBuilder.events:
-                startS = ev.startIdx / fps
-                endS = ev.endIdx / fps
-                dur = endS - startS
-                if ev.bbox:
-                    x, y, bw, bh = ev.bbox
-                else:
-                    x = y = bw = bh = ""
-                w.writerow([ev.id, ev.startIdx, ev.endIdx, f"{startS:.3f}", f"{endS:.3f}", f"{dur:.3f}", x, y, bw, bh])
+                w.writerow(eventCsvRow(ev, fps))
 
         self.writeLog(f"Saved live events CSV: {self.liveEventsCsvPath}")
+        if self.activity is not None:
+            heatmapPath = self.activity.saveHeatmap(self.outputDir / self.cfg.live_heatmap_name, self.heatmapBackground)
+            timelinePath = self.activity.saveTimeline(self.outputDir / self.cfg.live_timeline_name)
+            self.writeLog(f"Saved heatmap: {heatmapPath}")
+            self.writeLog(f"Saved activity timeline: {timelinePath}")
+            self.activity = None
+            self.heatmapBackground = None
         self.liveSessionActive = False
 
-    def _scheduleNextFrame(self):
-        delayMs = self.liveController.getDelayMs()
+    def _scheduleNextFrame(self, delayMs: int):
         self.liveAfterId = self.after(delayMs, self._updateFrame)
 
+    def _logStats(self):
+        st = self.scheduler.stats
+        self.writeLog(
+            f"Live: fps={st.achievedFps:.1f}/{self.liveCfg.target_fps} | dropped={st.droppedFrames} | "
+            f"proc={st.procMsAvg:.1f}ms"
+            + (f" | detection {self.governor.describe()}" if self.governor is not None else "")
+            + (f" | {self.notifier.describeStats()}" if self.notifier is not None else "")
+        )
+
     def _resizeToFit(self, frameRgb, targetW: int, targetH: int):
         h, w = frameRgb.shape[:2]
         if targetW <= 1 or targetH <= 1:
@@ -166,23 +258,55 @@ class LiveFeedWindow(tk.Toplevel):
         return cv2.resize(frameRgb, (newW, newH), interpolation=cv2.INTER_AREA)
 
     def _updateFrame(self):
+        startedAt = time.perf_counter()
         frameRgb = self.liveController.readFrameRgb()
         if frameRgb is None:
+            if not self.liveController.feedEnded:
+                # Camera is reconnecting; try again on the next slot
+                delayMs, _ = self.scheduler.frameDone(startedAt)
+                self._scheduleNextFrame(delayMs)
+                return
             self.writeLog("Live feed frame read failed. Stopping feed.")
             self.stopLiveFeed()
             return
 
         self.liveFrameIdx += 1
+        readDoneAt = time.perf_counter()
+        if self.activity is None and self.cfg.activity_enabled:
+            h, w = frameRgb.shape[:2]
+            self.activity = makeActivitySummary(self.cfg, w, h, self.liveController.getFps(), baseTs=time.time())
+            self.heatmapBackground = frameRgb[:, :, ::-1].copy()
+
+        # Keep an unannotated copy for the clip recorder before overlays are drawn
+        rawFrame = frameRgb.copy() if self.clipRecorder is not None else None
 
         # Motion detection
         if bool(self.motionEnabled.get()):
-            motionRes = self.motionDetector.update(frameRgb)
+            if self.governor is None or self.governor.shouldDetect():
+                motionRes = self.motionDetector.update(frameRgb, elapsedFrames=self.liveFrameIdx - self._lastDetectIdx)
+                self._lastDetectIdx = self.liveFrameIdx
+                hasMotion, boxes, trackBoxes = applyTracker(
+                    self.tracker, self.liveFrameIdx, motionRes.hasMotion, motionRes.boxes
+                )
+                self._heldMotion = (hasMotion, boxes, trackBoxes, motionRes.motionScore)
+                if self.activity is not None:
+                    self.activity.update(
+                        self.liveFrameIdx, hasMotion, motionRes.motionScore, motionRes.mask, motionRes.offset, motionRes.maskScale
+                    )
+            else:
+                # Displayed but not detected: hold the last result, under this frame's own index
+                hasMotion, boxes, trackBoxes, score = self._heldMotion
+                if self.activity is not None:
+                    self.activity.update(self.liveFrameIdx, hasMotion, score)
 
             # Draw overlays onto RGB frame
-            for (x, y, w, h) in motionRes.boxes:
+            for (x, y, w, h) in boxes:
                 cv2.rectangle(frameRgb, (x, y), (x + w, y + h), (0, 255, 0), 2)
+            if trackBoxes:
+                for tid, (x, y, w, h) in trackBoxes.items():
+                    cv2.putText(frameRgb, f"#{tid}", (x, max(12, y - 4)), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
 
-            if motionRes.hasMotion:
+            if hasMotion:
                 cv2.putText(
                     frameRgb, "MOTION",
                     (10, 30),
@@ -194,7 +318,15 @@ class LiveFeedWindow(tk.Toplevel):
                 )
 
             if self.liveEventBuilder is not None:
-                self.liveEventBuilder.update(self.liveFrameIdx, motionRes.hasMotion, motionRes.boxes)
+                self.liveEventBuilder.update(self.liveFrameIdx, hasMotion, boxes, trackBoxes, score=self._heldMotion[3])
+
+        if self.clipRecorder is not None and self.liveEventBuilder is not None:
+            self.clipRecorder.onFrame(self.liveFrameIdx, rawFrame, self.liveEventBuilder)
+
+        # Governor gets detection + overlay time only: display cost does not shrink with detection scale
+        if self.governor is not None and bool(self.motionEnabled.get()):
+            if self.governor.frameDone(1000.0 * (time.perf_counter() - readDoneAt)):
+                self.motionDetector.setScale(self.governor.level.scale)
 
         targetW = self.imageLabel.winfo_width()
         targetH = self.imageLabel.winfo_height()
@@ -205,15 +337,42 @@ class LiveFeedWindow(tk.Toplevel):
 
         frameRgb = self._resizeToFit(frameRgb, targetW, targetH)
 
+        if bool(self.statsOverlay.get()):
+            st = self.scheduler.stats
+            cv2.putText(
+                frameRgb,
+                f"{st.achievedFps:.1f}/{self.liveCfg.target_fps} fps | dropped {st.droppedFrames} | {st.procMsLast:.1f} ms"
+                + (f" | {self.governor.describe()}" if self.governor is not None else ""),
+                (10, frameRgb.shape[0] - 12),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                0.5,
+                (255, 255, 0),
+                1,
+                cv2.LINE_AA
+            )
+
         pilImage = Image.fromarray(frameRgb)
         self.liveTkImage = ImageTk.PhotoImage(pilImage)
         self.imageLabel.config(image=self.liveTkImage)
 
-        self._scheduleNextFrame()
+        delayMs, dropped = self.scheduler.frameDone(startedAt)
+        if dropped:
+            # Keep frame indices on the wall-clock timeline so event timestamps stay right
+            self.liveController.skipFrames(dropped)
+            self.liveFrameIdx += dropped
+
+        now = time.perf_counter()
+        if now - self._lastStatsLog >= self.statsLogIntervalS:
+            self._lastStatsLog = now
+            self._logStats()
+
+        self._scheduleNextFrame(delayMs)
 
     def onClose(self):
         try:
             self.stopLiveFeed()
         except Exception:
             pass
+        self.after_cancel(self._logDrainId)
+        self._flushLogQueue()
         self.destroy()
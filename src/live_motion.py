@@ -6,6 +6,8 @@ from typing import List, Tuple, Optional
 import cv2
 import numpy as np
 
+from roi import RegionConfig, RegionMask, resolveRegion
+
 
 @dataclass
 class LiveMotionConfig:
@@ -25,28 +27,79 @@ class MotionResult:
     hasMotion: bool
     boxes: List[Tuple[int, int, int, int]]  # x, y, w, h
     motionScore: float                      # 0..1 fraction of mask pixels
+    mask: Optional[np.ndarray] = None       # binary mask (ROI rectangle only when a region is used)
+    offset: Tuple[int, int] = (0, 0)        # top-left of mask in the frame
+    maskScale: float = 1.0                  # mask size / frame (or ROI) size
 
 
 class LiveMotionDetector:
-    def __init__(self, cfg: LiveMotionConfig):
+    def __init__(self, cfg: LiveMotionConfig, region: Optional[RegionConfig] = None):
         self.cfg = cfg
+        self.region = region
+        self.regionMask: Optional[RegionMask] = None
+        self._regionSize: Optional[Tuple[int, int]] = None
         self.bg: Optional[np.ndarray] = None
         self.frameCount = 0
+        # Detection resolution relative to the input (lowered by the live governor under load)
+        self.scale = 1.0
+        self._scaledRegionMask: Optional[np.ndarray] = None
 
     def reset(self):
         self.bg = None
         self.frameCount = 0
-
-    def update(self, frameRgb: np.ndarray) -> MotionResult:
+        self.regionMask = None
+        self._regionSize = None
+
+    def setRegion(self, region: Optional[RegionConfig]):
+        self.region = region
+        self.reset()
+
+    def setScale(self, scale: float):
+        # The background model is resampled on the next frame rather than rebuilt
+        self.scale = float(min(1.0, max(0.1, scale)))
+        self._scaledRegionMask = None
+
+    def _regionMaskAt(self, shape) -> Optional[np.ndarray]:
+        if self.regionMask is None or self.regionMask.mask is None:
+            return None
+        if self.scale >= 1.0:
+            return self.regionMask.mask
+        if self._scaledRegionMask is None or self._scaledRegionMask.shape != shape:
+            self._scaledRegionMask = cv2.resize(
+                self.regionMask.mask, (shape[1], shape[0]), interpolation=cv2.INTER_NEAREST
+            )
+        return self._scaledRegionMask
+
+    def update(self, frameRgb: np.ndarray, elapsedFrames: int = 1) -> MotionResult:
         """
         frameRgb: RGB numpy array (H, W, 3)
+        elapsedFrames: input frames since the previous update (> 1 when frames are skipped)
         returns MotionResult with bounding boxes in image coordinates.
         """
-        self.frameCount += 1
+        elapsedFrames = max(1, int(elapsedFrames))
+        self.frameCount += elapsedFrames
+
+        # Crop to the ROI rectangle before any preprocessing (background model is crop-sized)
+        if self.region is not None:
+            h, w = frameRgb.shape[:2]
+            if self._regionSize != (w, h):
+                self._regionSize = (w, h)
+                self.regionMask = resolveRegion(self.region, w, h)
+                self.bg = None
+            if self.regionMask is not None:
+                frameRgb = self.regionMask.crop(frameRgb)
 
         frameGray = cv2.cvtColor(frameRgb, cv2.COLOR_RGB2GRAY)
 
-        k = int(self.cfg.blur_ksize)
+        scale = self.scale
+        if scale < 1.0:
+            # Bilinear is enough ahead of the blur, and much cheaper than area averaging at odd ratios
+            h, w = frameGray.shape[:2]
+            frameGray = cv2.resize(
+                frameGray, (max(1, int(round(w * scale))), max(1, int(round(h * scale)))), interpolation=cv2.INTER_LINEAR
+            )
+
+        k = int(self.cfg.blur_ksize) if scale >= 1.0 else max(3, int(round(self.cfg.blur_ksize * scale)))
         if k % 2 == 0:
             k += 1
         frameGray = cv2.GaussianBlur(frameGray, (k, k), 0)
@@ -54,9 +107,14 @@ class LiveMotionDetector:
         if self.bg is None:
             self.bg = frameGray.astype("float32")
             return MotionResult(False, [], 0.0)
-
-        # Running average background
-        cv2.accumulateWeighted(frameGray, self.bg, self.cfg.alpha)
+        if self.bg.shape != frameGray.shape:
+            # Detection scale changed: keep the learnt background, resampled
+            self.bg = cv2.resize(self.bg, (frameGray.shape[1], frameGray.shape[0]), interpolation=cv2.INTER_LINEAR)
+
+        # Running average background; over skipped frames it should have adapted as much
+        # as it would have frame by frame
+        alpha = self.cfg.alpha if elapsedFrames == 1 else 1.0 - (1.0 - self.cfg.alpha) ** elapsedFrames
+        cv2.accumulateWeighted(frameGray, self.bg, alpha)
         bgUint8 = cv2.convertScaleAbs(self.bg)
 
         diff = cv2.absdiff(frameGray, bgUint8)
@@ -64,21 +122,33 @@ class LiveMotionDetector:
         _, mask = cv2.threshold(diff, int(self.cfg.diff_threshold), 255, cv2.THRESH_BINARY)
         mask = cv2.dilate(mask, None, iterations=int(self.cfg.morph_iters))
         mask = cv2.erode(mask, None, iterations=max(1, int(self.cfg.morph_iters) - 1))
+        regionMask = self._regionMaskAt(mask.shape)
+        if regionMask is not None:
+            cv2.bitwise_and(mask, regionMask, dst=mask)
 
         contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
 
+        minArea = int(self.cfg.min_contour_area) if scale >= 1.0 else self.cfg.min_contour_area * scale * scale
         boxes: List[Tuple[int, int, int, int]] = []
         for c in contours:
             area = cv2.contourArea(c)
-            if area < int(self.cfg.min_contour_area):
+            if area < minArea:
                 continue
             x, y, w, h = cv2.boundingRect(c)
+            if scale < 1.0:
+                # Back to input coordinates
+                x0, y0 = int(x / scale), int(y / scale)
+                x, y, w, h = x0, y0, int(np.ceil((x + w) / scale)) - x0, int(np.ceil((y + h) / scale)) - y0
             boxes.append((x, y, w, h))
 
         motionScore = float(np.count_nonzero(mask)) / float(mask.size)
+        if self.regionMask is not None:
+            boxes = self.regionMask.toFrame(boxes)
+
+        offset = self.regionMask.offset if self.regionMask is not None else (0, 0)
 
         # Ignore motion during warmup
         if self.frameCount < int(self.cfg.warmup_frames):
             return MotionResult(False, [], motionScore)
 
-        return MotionResult(len(boxes) > 0, boxes, motionScore)
+        return MotionResult(len(boxes) > 0, boxes, motionScore, mask, offset, scale)
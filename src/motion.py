@@ -1,36 +1,38 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 import cv2
 import numpy as np
 
+from roi import RegionMask
+
 @dataclass
 class MotionResult:
     motion: bool
     mask: np.ndarray                 # binary motion mask
     boxes: List[Tuple[int, int, int, int]]  # (x, y, w, h)
     score: float                     # simple motion score
+    # top-left of `mask` in the frame (mask covers only the ROI rectangle when a region is used)
+    offset: Tuple[int, int] = (0, 0)
 
-def detectMotion(
-    prevBgr: np.ndarray,
-    currBgr: np.ndarray,
+def blurKernelSize(blurKernel: int) -> int:
+    return blurKernel if blurKernel % 2 == 1 else blurKernel + 1
+
+def frameDiff(prevGray: np.ndarray, currGray: np.ndarray, blurKernel: int) -> np.ndarray:
+    # Frame differencing + blur (the part that depends only on the frames and kernel)
+    diff = cv2.absdiff(prevGray, currGray)
+    k = blurKernelSize(blurKernel)
+    return cv2.GaussianBlur(diff, (k, k), 0)
+
+def detectMotionFromDiff(
+    diff: np.ndarray,
     diffThreshold: int,
     minContourArea: int,
-    blurKernel: int,
     erodeIters: int,
     dilateIters: int,
+    region: Optional[RegionMask] = None,
 ) -> MotionResult:
-    # Convert to gray for robustness
-    prev = cv2.cvtColor(prevBgr, cv2.COLOR_BGR2GRAY)
-    curr = cv2.cvtColor(currBgr, cv2.COLOR_BGR2GRAY)
-
-    # Frame differencing
-    diff = cv2.absdiff(prev, curr)
-
-    # Blur -> threshold -> morphology
-    k = blurKernel if blurKernel % 2 == 1 else blurKernel + 1
-    diff = cv2.GaussianBlur(diff, (k, k), 0)
-
+    # Threshold -> morphology
     _, th = cv2.threshold(diff, diffThreshold, 255, cv2.THRESH_BINARY)
 
     if erodeIters > 0:
@@ -38,6 +40,9 @@ def detectMotion(
     if dilateIters > 0:
         th = cv2.dilate(th, None, iterations=dilateIters)
 
+    if region is not None:
+        region.applyMask(th)
+
     # Contours
     contours, _ = cv2.findContours(th, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
 
@@ -52,9 +57,35 @@ def detectMotion(
     # Motion score = % of pixels flagged
     score = float(np.mean(th > 0))
 
+    if region is not None:
+        boxes = region.toFrame(boxes)
+
     return MotionResult(
         motion=len(boxes) > 0,
         mask=th,
         boxes=boxes,
         score=score,
+        offset=region.offset if region is not None else (0, 0),
     )
+
+def detectMotion(
+    prevBgr: np.ndarray,
+    currBgr: np.ndarray,
+    diffThreshold: int,
+    minContourArea: int,
+    blurKernel: int,
+    erodeIters: int,
+    dilateIters: int,
+    region: Optional[RegionMask] = None,
+) -> MotionResult:
+    # Crop to the ROI rectangle first so everything below touches only those pixels
+    if region is not None:
+        prevBgr = region.crop(prevBgr)
+        currBgr = region.crop(currBgr)
+
+    # Convert to gray for robustness
+    prev = cv2.cvtColor(prevBgr, cv2.COLOR_BGR2GRAY)
+    curr = cv2.cvtColor(currBgr, cv2.COLOR_BGR2GRAY)
+
+    diff = frameDiff(prev, curr, blurKernel)
+    return detectMotionFromDiff(diff, diffThreshold, minContourArea, erodeIters, dilateIters, region)
@@ -0,0 +1,383 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import ssl
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from events import Event, eventDurationS
+
+_RETRYABLE_STATUS = (408, 425, 429)
+
+
+@dataclass
+class NotifierStats:
+    queued: int = 0                     # notifications raised by the builder
+    sent: int = 0                       # deliveries acknowledged (one per endpoint)
+    failed: int = 0                     # gave up after retries (or a permanent 4xx)
+    dropped: int = 0                    # pushed out of a full outbox
+    retries: int = 0
+    batches: int = 0
+    connectionsOpened: int = 0
+    queueDepth: int = 0                 # payloads waiting, summed over endpoints
+    queueDepthMax: int = 0
+    latencyMsSum: float = 0.0           # enqueue -> 2xx acknowledged
+    latencyMsMax: float = 0.0
+
+    @property
+    def latencyMsAvg(self) -> float:
+        return self.latencyMsSum / self.sent if self.sent else 0.0
+
+
+class _Connection:
+
+    # Minimal HTTP/1.1 client over one keep-alive asyncio stream.
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    async def post(self, hostHeader: str, path: str, body: bytes) -> Tuple[int, bool]:
+        head = (
+            f"POST {path} HTTP/1.1\r\n"
+            f"Host: {hostHeader}\r\n"
+            "User-Agent: MotionDetection\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: keep-alive\r\n\r\n"
+        )
+        self.writer.write(head.encode("latin-1") + body)
+        await self.writer.drain()
+
+        statusLine = await self.reader.readline()
+        if not statusLine:
+            raise ConnectionError("connection closed by server")
+        parts = statusLine.decode("latin-1").split(None, 2)
+        if len(parts) < 2 or not parts[0].startswith("HTTP/"):
+            raise ValueError(f"bad status line: {statusLine!r}")
+        status = int(parts[1])
+
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        keepAlive = parts[0] == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0].strip() or b"0", 16)
+                await self.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        elif "content-length" in headers:
+            await self.reader.readexactly(int(headers["content-length"]))
+        else:
+            await self.reader.read()
+            keepAlive = False
+        return status, keepAlive
+
+    def close(self):
+        try:
+            self.writer.close()
+        except Exception:
+            pass
+
+
+class _ConnectionPool:
+
+    # Keep-alive connections to one endpoint, reused across batches. A reused connection
+    # that turns out to be stale (closed by the server while idle) is replaced once
+    # without counting as a retry.
+
+    def __init__(self, url: str, timeoutS: float, stats: NotifierStats):
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise RuntimeError(f"Unsupported webhook URL: {url}")
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.ssl = ssl.create_default_context() if parts.scheme == "https" else None
+        self.hostHeader = parts.netloc.rpartition("@")[2]
+        self.path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        self.timeoutS = timeoutS
+        self.stats = stats
+        self._idle: List[_Connection] = []
+
+    async def _open(self) -> _Connection:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, ssl=self.ssl), self.timeoutS
+        )
+        self.stats.connectionsOpened += 1
+        return _Connection(reader, writer)
+
+    async def post(self, body: bytes) -> int:
+        conn = self._idle.pop() if self._idle else None
+        if conn is not None:
+            try:
+                status, keepAlive = await asyncio.wait_for(conn.post(self.hostHeader, self.path, body), self.timeoutS)
+            except (OSError, ConnectionError, asyncio.IncompleteReadError):
+                conn.close()
+                conn = None
+            except BaseException:
+                conn.close()
+                raise
+        if conn is None:
+            conn = await self._open()
+            try:
+                status, keepAlive = await asyncio.wait_for(conn.post(self.hostHeader, self.path, body), self.timeoutS)
+            except BaseException:
+                conn.close()
+                raise
+        if keepAlive:
+            self._idle.append(conn)
+        else:
+            conn.close()
+        return status
+
+    def close(self):
+        for conn in self._idle:
+            conn.close()
+        self._idle = []
+
+
+class _Endpoint:
+
+    # One receiver: its own bounded outbox (oldest payload dropped when full), connection
+    # pool and sender task, so a slow or dead receiver only delays itself.
+
+    def __init__(self, url: str, notifier: "WebhookNotifier"):
+        self.url = url
+        self.n = notifier
+        self.pool = _ConnectionPool(url, notifier.timeoutS, notifier.stats)
+        self.outbox: deque = deque()
+        # Created in the loop thread (_run): before 3.10 an Event binds to the current loop
+        self.wake: Optional[asyncio.Event] = None
+
+    def put(self, item: Tuple[float, dict]):
+        if len(self.outbox) >= self.n.maxOutbox:
+            self.outbox.popleft()
+            self.n.stats.dropped += 1
+            self.n._queueChanged(-1)
+        self.outbox.append(item)
+        self.n._queueChanged(+1)
+        self.wake.set()
+
+    async def run(self):
+        try:
+            while True:
+                if not self.outbox:
+                    if self.n._closing:
+                        return
+                    self.wake.clear()
+                    await self.wake.wait()
+                    continue
+                # Linger briefly so events closing close together share one request
+                if len(self.outbox) < self.n.batchSize and not self.n._closing:
+                    await asyncio.sleep(self.n.flushIntervalS)
+                batch = [self.outbox.popleft() for _ in range(min(self.n.batchSize, len(self.outbox)))]
+                self.n._queueChanged(-len(batch))
+                await self._deliver(batch)
+        finally:
+            self.pool.close()
+
+    async def _deliver(self, batch: List[Tuple[float, dict]]):
+        n = self.n
+        body = json.dumps({"source": n.source, "session": n.session, "events": [p for _, p in batch]}).encode("utf-8")
+        attempt = 0
+        while True:
+            try:
+                status = await self.pool.post(body)
+                if 200 <= status < 300:
+                    now = time.perf_counter()
+                    n.stats.batches += 1
+                    for queuedAt, _ in batch:
+                        ms = 1000.0 * (now - queuedAt)
+                        n.stats.sent += 1
+                        n.stats.latencyMsSum += ms
+                        n.stats.latencyMsMax = max(n.stats.latencyMsMax, ms)
+                    return
+                error = f"HTTP {status}"
+                if 400 <= status < 500 and status not in _RETRYABLE_STATUS:
+                    n.stats.failed += len(batch)
+                    n.writeLog(f"Webhook {self.url} rejected {len(batch)} notification(s): {error}")
+                    return
+            except (OSError, ConnectionError, ValueError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+                error = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+
+            attempt += 1
+            if attempt > n.maxRetries:
+                n.stats.failed += len(batch)
+                n.writeLog(f"Webhook {self.url} failed after {n.maxRetries} retries ({error}); {len(batch)} notification(s) lost")
+                return
+            n.stats.retries += 1
+            await asyncio.sleep(min(n.maxBackoffS, n.backoffS * (2 ** (attempt - 1))))
+
+
+class WebhookNotifier:
+
+    # Posts event start/end notifications to HTTP endpoints from an asyncio loop on its own
+    # thread. The detection thread only appends to an in-memory outbox, so a slow or
+    # unreachable receiver never stalls processVideo or the live loop.
+    #
+    # Wire it as EventBuilder(onEvent=notifier, onEventStart=notifier.eventStarted).
+    # Each POST carries a JSON batch: {"source", "session", "events": [payload, ...]}.
+
+    def __init__(
+        self,
+        urls: List[str],
+        source: str,
+        fps: float,
+        baseTs: Optional[float] = None,
+        thumbnailFor: Optional[Callable[[Event], Optional[str]]] = None,
+        batchSize: int = 20,
+        flushIntervalS: float = 0.25,
+        maxOutbox: int = 1000,
+        maxRetries: int = 5,
+        backoffS: float = 0.5,
+        maxBackoffS: float = 10.0,
+        timeoutS: float = 5.0,
+        logFn=None,
+    ):
+        if not urls:
+            raise RuntimeError("No webhook URLs given")
+        self.urls = list(urls)
+        self.source = source
+        self.fps = max(1e-6, float(fps))
+        self.baseTs = time.time() if baseTs is None else float(baseTs)
+        self.session = f"{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+        self.thumbnailFor = thumbnailFor
+        self.batchSize = max(1, int(batchSize))
+        self.flushIntervalS = max(0.0, float(flushIntervalS))
+        self.maxOutbox = max(1, int(maxOutbox))
+        self.maxRetries = max(0, int(maxRetries))
+        self.backoffS = backoffS
+        self.maxBackoffS = maxBackoffS
+        self.timeoutS = timeoutS
+        self.logFn = logFn
+        self.stats = NotifierStats()
+
+        self._closing = False
+        # Built here so a bad URL raises in the caller
+        self._endpoints = [_Endpoint(url, self) for url in self.urls]
+        self._loop = asyncio.new_event_loop()
+        self._mainTask: Optional[asyncio.Task] = None
+        self._thread = threading.Thread(target=self._run, name="WebhookNotifier", daemon=True)
+        self._thread.start()
+
+    def writeLog(self, msg: str):
+        if self.logFn:
+            self.logFn(msg)
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        # Before the loop runs, so put()/close() callbacks always find the Events
+        for ep in self._endpoints:
+            ep.wake = asyncio.Event()
+        self._mainTask = self._loop.create_task(self._main())
+        try:
+            self._loop.run_until_complete(self._mainTask)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._loop.close()
+
+    async def _main(self):
+        results = await asyncio.gather(*(ep.run() for ep in self._endpoints), return_exceptions=True)
+        for ep, res in zip(self._endpoints, results):
+            if isinstance(res, Exception):
+                self.writeLog(f"Webhook sender for {ep.url} stopped: {res}")
+
+    def _queueChanged(self, delta: int):
+        self.stats.queueDepth += delta
+        self.stats.queueDepthMax = max(self.stats.queueDepthMax, self.stats.queueDepth)
+
+    # Called from the detection thread
+
+    def _payload(self, kind: str, ev: Event) -> dict:
+        payload = {
+            "type": kind,
+            "event_id": ev.id,
+            "start_frame": ev.startIdx,
+            "start_ts": round(self.baseTs + ev.startIdx / self.fps, 3),
+            "bbox": list(ev.bbox) if ev.bbox else None,
+            "score": round(ev.score, 5),
+            "thumbnail": None,
+        }
+        if kind == "event_start":
+            payload["frame"] = ev.endIdx
+        else:
+            payload["end_frame"] = ev.endIdx
+            payload["end_ts"] = round(self.baseTs + ev.endIdx / self.fps, 3)
+            payload["duration_s"] = round(eventDurationS(ev, self.fps), 3)
+            thumb = self.thumbnailFor(ev) if self.thumbnailFor is not None else None
+            if thumb:
+                payload["thumbnail"] = str(thumb)
+        return payload
+
+    def _enqueue(self, payload: dict):
+        if self._closing or not self._thread.is_alive():
+            return
+        item = (time.perf_counter(), payload)
+        self.stats.queued += 1
+
+        def put():
+            for ep in self._endpoints:
+                ep.put(item)
+        self._loop.call_soon_threadsafe(put)
+
+    def eventStarted(self, ev: Event):
+        self._enqueue(self._payload("event_start", ev))
+
+    def __call__(self, ev: Event):
+        self._enqueue(self._payload("event_end", ev))
+
+    def describeStats(self) -> str:
+        st = self.stats
+        return (
+            f"notify sent={st.sent} failed={st.failed} dropped={st.dropped} retries={st.retries} "
+            f"queue={st.queueDepth} (max {st.queueDepthMax}) latency avg={st.latencyMsAvg:.0f}ms max={st.latencyMsMax:.0f}ms"
+        )
+
+    def close(self, timeoutS: float = 5.0):
+        """
+        Delivers what is still queued (up to timeoutS, retries included), then stops the loop.
+        """
+        if not self._thread.is_alive():
+            return
+
+        def beginClose():
+            self._closing = True
+            for ep in self._endpoints:
+                ep.wake.set()
+        self._loop.call_soon_threadsafe(beginClose)
+        self._thread.join(timeoutS)
+        if self._thread.is_alive():
+            self._loop.call_soon_threadsafe(self._mainTask.cancel)
+            self._thread.join(2.0)
+            self.writeLog(f"Webhook notifier stopped with {self.stats.queueDepth} notification(s) undelivered")
+
+
+def makeNotifier(cfg, source: str, fps: float, baseTs: Optional[float] = None, thumbnailFor=None, logFn=None) -> Optional[WebhookNotifier]:
+    if not cfg.webhook_urls:
+        return None
+    return WebhookNotifier(
+        cfg.webhook_urls,
+        source,
+        fps,
+        baseTs=baseTs,
+        thumbnailFor=thumbnailFor,
+        batchSize=cfg.webhook_batch_size,
+        flushIntervalS=cfg.webhook_flush_interval_s,
+        maxOutbox=cfg.webhook_max_outbox,
+        maxRetries=cfg.webhook_max_retries,
+        timeoutS=cfg.webhook_timeout_s,
+        logFn=logFn,
+    )
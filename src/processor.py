@@ -1,32 +1,52 @@
 from __future__ import annotations
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Optional
 import csv
 import cv2
 
 from config import AppConfig
-from video_io import openVideo, makeWriter
+from activity import makeActivitySummary
+from event_index import makeThumbnailer, writeEventIndex
+from video_io import makeWriter
+from video_source import openSource
 from motion import detectMotion
-from events import EventBuilder
+from event_store import openEventSink
+from notifier import makeNotifier
+from roi import regionFor, resolveRegion
+from tracker import applyTracker, makeTracker
+from events import EventBuilder, EVENTS_CSV_HEADER, chainCallbacks, eventCsvRow
 
 @dataclass
 class ProcessResult:
     highlightPath: Path
     eventsCsvPath: Path
     eventCount: int
+    heatmapPath: Optional[Path] = None
+    timelinePath: Optional[Path] = None
+    eventIndexPath: Optional[Path] = None
 
-def annotateFrame(frame, boxes, text: str):
-    for (x, y, w, h) in boxes:
+def annotateFrame(frame, boxes, text: str, labels=None):
+    for i, (x, y, w, h) in enumerate(boxes):
         cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
+        if labels is not None:
+            cv2.putText(frame, f"#{labels[i]}", (x, max(12, y - 4)), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
     cv2.putText(frame, text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2)
 
+def drawOverlay(frame, motion: bool, boxes, text: str, labels=None):
+    if motion:
+        annotateFrame(frame, boxes, text, labels=labels)
+    else:
+        cv2.putText(frame, text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (200, 200, 200), 2)
+
 def processVideo(inputPath: Path, cfg: AppConfig, logFn=None) -> ProcessResult:
     outputDir = cfg.output_dir
     eventsDir = outputDir / cfg.events_dirname
     outputDir.mkdir(parents=True, exist_ok=True)
     eventsDir.mkdir(parents=True, exist_ok=True)
 
-    cap, meta = openVideo(inputPath)
+    source = openSource(inputPath, prefetch=cfg.prefetch_frames)
+    meta = source.meta
 
     highlightPath = outputDir / cfg.highlight_name
     writer = makeWriter(highlightPath, meta.fps, meta.width, meta.height)
@@ -34,77 +54,135 @@ def processVideo(inputPath: Path, cfg: AppConfig, logFn=None) -> ProcessResult:
     eventsCsvPath = outputDir / cfg.events_csv_name
 
     # Read first frame
-    ok, prev = cap.read()
+    ok, prev = source.read()
     if not ok:
-        cap.release()
+        source.release()
         writer.release()
         raise RuntimeError("Could not read first frame.")
 
     frameIdx = 0
-    builder = EventBuilder(cfg.pre_roll_frames, cfg.post_roll_frames, cfg.min_event_frames)
-
-    #log per-frame, then summarize events
-    perFrameMotion = []
-
-    if logFn:
-        logFn(f"Video: {inputPath.name} | {meta.width}x{meta.height} | fps={meta.fps:.2f} | frames={meta.frameCount}")
-
-    while True:
-        ok, curr = cap.read()
-        if not ok:
-            break
-
-        frameIdx += 1
-
-        res = detectMotion(
-            prevBgr=prev,
-            currBgr=curr,
-            diffThreshold=cfg.diff_threshold,
-            minContourArea=cfg.min_contour_area,
-            blurKernel=cfg.blur_kernel,
-            erodeIters=cfg.erode_iters,
-            dilateIters=cfg.dilate_iters,
+    # A recording's mtime is roughly when it ended, so back off by its duration for wall-clock time
+    durationS = meta.frameCount / meta.fps if meta.frameCount > 0 else 0.0
+    baseTs = inputPath.stat().st_mtime - durationS
+    # Whatever happens below, the database, webhook thread, decoder and writer are closed
+    sink = notifier = None
+    try:
+        sink = openEventSink(cfg, inputPath.name, meta.fps, baseTs=baseTs)
+        thumbnailer = makeThumbnailer(cfg, outputDir)
+        notifier = makeNotifier(
+            cfg, inputPath.name, meta.fps, baseTs=baseTs,
+            thumbnailFor=thumbnailer.thumbnailFor if thumbnailer is not None else None, logFn=logFn,
         )
-
-        timestampS = frameIdx / meta.fps
-        text = f"{timestampS:0.2f}s | Motion: {'YES' if res.motion else 'no'} | score={res.score:.4f}"
-
-        frameOut = curr.copy()
-        if res.motion:
-            annotateFrame(frameOut, res.boxes, text)
-        else:
-            cv2.putText(frameOut, text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (200, 200, 200), 2)
-
-        writer.write(frameOut)
-
-        builder.update(frameIdx, res.motion, res.boxes)
-        perFrameMotion.append((frameIdx, timestampS, res.motion, res.score))
-
-        prev = curr
-
-    # Finalize any open event
-    builder.finalize(frameIdx)
-
-    cap.release()
-    writer.release()
+        builder = EventBuilder(
+            cfg.pre_roll_frames, cfg.post_roll_frames, cfg.min_event_frames,
+            # The thumbnail is saved before the notifier sends the event
+            onEvent=chainCallbacks(sink, thumbnailer, notifier),
+            onEventStart=notifier.eventStarted if notifier is not None else None,
+        )
+        tracker = makeTracker(cfg)
+        region = resolveRegion(regionFor(cfg, inputPath.name), prev.shape[1], prev.shape[0])
+        activity = makeActivitySummary(cfg, prev.shape[1], prev.shape[0], meta.fps, baseTs=baseTs)
+        # First frame is the heatmap backdrop
+        heatmapBackground = prev.copy() if activity is not None else None
+
+        #log per-frame, then summarize events
+        perFrameMotion = []
+
+        if logFn:
+            logFn(f"Video: {inputPath.name} | {meta.width}x{meta.height} | fps={meta.fps:.2f} | frames={meta.frameCount}")
+            if region is not None:
+                logFn(f"Region: detecting in {region.rect} ({100 * region.areaFraction:.0f}% of frame)")
+
+        # Two frame buffers circulate: `prev` is annotated and written only once it has served as
+        # the previous frame for detection, then handed back to the source to decode into.
+        pendingOverlay = None
+        spare = None
+        while True:
+            ok, curr = source.read(image=spare)
+            spare = None
+            if not ok:
+                break
+
+            frameIdx += 1
+
+            res = detectMotion(
+                prevBgr=prev,
+                currBgr=curr,
+                diffThreshold=cfg.diff_threshold,
+                minContourArea=cfg.min_contour_area,
+                blurKernel=cfg.blur_kernel,
+                erodeIters=cfg.erode_iters,
+                dilateIters=cfg.dilate_iters,
+                region=region,
+            )
+
+            motion, boxes, trackBoxes = applyTracker(tracker, frameIdx, res.motion, res.boxes)
+
+            timestampS = frameIdx / meta.fps
+            text = f"{timestampS:0.2f}s | Motion: {'YES' if motion else 'no'} | score={res.score:.4f}"
+
+            if pendingOverlay is not None:
+                drawOverlay(prev, *pendingOverlay)
+                writer.write(prev)
+            pendingOverlay = (motion, boxes, text, list(trackBoxes) if trackBoxes else None)
+
+            builder.update(frameIdx, motion, boxes, trackBoxes, score=res.score)
+            if activity is not None:
+                activity.update(frameIdx, motion, res.score, res.mask, res.offset)
+            if thumbnailer is not None:
+                thumbnailer.update(frameIdx, motion, res.score, curr, builder)
+            perFrameMotion.append((frameIdx, timestampS, motion, res.score))
+
+            spare = prev
+            prev = curr
+
+        if pendingOverlay is not None:
+            drawOverlay(prev, *pendingOverlay)
+            writer.write(prev)
+
+        # Finalize any open event
+        builder.finalize(frameIdx)
+        if thumbnailer is not None:
+            thumbnailer.finish(builder)
+    finally:
+        if sink is not None:
+            sink.close()
+        if notifier is not None:
+            notifier.close()
+        source.release()
+        writer.release()
 
     # Write CSV
     with open(eventsCsvPath, "w", newline="", encoding="utf-8") as f:
         w = csv.writer(f)
-        w.writerow(["event_id", "start_frame", "end_frame", "start_s", "end_s", "duration_s", "bbox_x", "bbox_y", "bbox_w", "bbox_h"])
+        w.writerow(EVENTS_CSV_HEADER)
         for ev in builder.events:
-            startS = ev.startIdx / meta.fps
-            endS = ev.endIdx / meta.fps
-            dur = endS - startS
-            if ev.bbox:
-                x, y, bw, bh = ev.bbox
-            else:
-                x = y = bw = bh = ""
-            w.writerow([ev.id, ev.startIdx, ev.endIdx, f"{startS:.3f}", f"{endS:.3f}", f"{dur:.3f}", x, y, bw, bh])
+            w.writerow(eventCsvRow(ev, meta.fps))
+
+    heatmapPath = timelinePath = None
+    if activity is not None:
+        heatmapPath = activity.saveHeatmap(outputDir / cfg.heatmap_name, heatmapBackground)
+        timelinePath = activity.saveTimeline(outputDir / cfg.timeline_name)
+    eventIndexPath = writeEventIndex(outputDir / cfg.event_index_name, builder.events, meta.fps, inputPath, highlightPath, thumbnailer)
 
     if logFn:
         logFn(f"Saved highlight: {highlightPath}")
         logFn(f"Saved events CSV: {eventsCsvPath}")
+        if activity is not None:
+            logFn(f"Saved heatmap: {heatmapPath}")
+            logFn(f"Saved activity timeline: {timelinePath}")
+        logFn(f"Saved event index: {eventIndexPath}")
+        if sink is not None:
+            logFn(f"Appended events to database: {sink.store.dbPath}")
+        if notifier is not None:
+            logFn(f"Webhooks: {notifier.describeStats()}")
         logFn(f"Detected events: {len(builder.events)}")
 
-    return ProcessResult(highlightPath=highlightPath, eventsCsvPath=eventsCsvPath, eventCount=len(builder.events))
+    return ProcessResult(
+        highlightPath=highlightPath,
+        eventsCsvPath=eventsCsvPath,
+        eventCount=len(builder.events),
+        heatmapPath=heatmapPath,
+        timelinePath=timelinePath,
+        eventIndexPath=eventIndexPath,
+    )
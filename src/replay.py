@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from config import AppConfig
+from headless import HeadlessMonitor, printLog
+from live_feed import LiveFeedConfig
+from live_motion import LiveMotionConfig
+from roi import loadRegions
+
+
+@dataclass
+class ReplayResult:
+    frames: int
+    seconds: float
+    videoFps: float
+    eventCount: int
+    eventsCsvPath: Path
+
+    @property
+    def fps(self) -> float:
+        return self.frames / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def realtimeFactor(self) -> float:
+        # Seconds of recording processed per second of wall time
+        return self.fps / self.videoFps if self.videoFps > 0 else 0.0
+
+
+def replayFile(
+    path: Path,
+    cfg: AppConfig,
+    motionCfg: LiveMotionConfig,
+    throttle: bool = False,
+    fps: int = 25,
+    flipHorizontal: bool = False,
+    maxFrames: Optional[int] = None,
+    logFn=None,
+    statsIntervalS: float = 10.0,
+    adaptive: bool = False,
+) -> ReplayResult:
+    """
+    Feeds a recorded video (or frame directory) through the live pipeline -- the same
+    capture, LiveMotionDetector, tracker and EventBuilder a headless session uses -- and
+    writes the same live_events.csv. Runs as fast as detection allows unless `throttle`
+    paces it to the recording's fps. `fps` is only used for frame directories. Adaptive
+    detection is off by default so replays are repeatable.
+    """
+    path = Path(path)
+    if not path.exists():
+        raise RuntimeError(f"Replay needs a video file or frame directory: {path}")
+
+    monitor = HeadlessMonitor(
+        cfg,
+        LiveFeedConfig(source=str(path), target_fps=fps, flip_horizontal=flipHorizontal, adaptive_detection=adaptive),
+        motionCfg,
+        logFn=logFn,
+        statsIntervalS=statsIntervalS,
+        throttle=throttle,
+    )
+    eventCount = monitor.run(maxFrames=maxFrames)
+    return ReplayResult(
+        frames=monitor.frameIdx,
+        seconds=monitor.elapsedS,
+        videoFps=monitor.fps,
+        eventCount=eventCount,
+        eventsCsvPath=monitor.eventsCsvPath,
+    )
+
+
+def main(argv=None) -> int:
+    defaults = LiveMotionConfig()
+    parser = argparse.ArgumentParser(description="Replay a recording through the live detection pipeline.")
+    parser.add_argument("video", type=Path, help="video file or frame directory")
+    parser.add_argument("--throttle", action="store_true", help="pace playback to the recording's fps")
+    parser.add_argument("--fps", type=int, default=25, help="frame rate for frame directories")
+    parser.add_argument("--output-dir", type=Path, help="override the output folder")
+    parser.add_argument("--threshold", type=int, default=defaults.diff_threshold, help="motion diff threshold (0-255)")
+    parser.add_argument("--min-area", type=int, default=defaults.min_contour_area, help="minimum contour area in px^2")
+    parser.add_argument("--blur", type=int, default=defaults.blur_ksize, help="blur kernel size (odd)")
+    parser.add_argument("--morph-iters", type=int, default=defaults.morph_iters)
+    parser.add_argument("--alpha", type=float, default=defaults.alpha, help="background adaptation rate")
+    parser.add_argument("--warmup", type=int, default=defaults.warmup_frames, help="frames before motion is reported")
+    parser.add_argument("--flip", action="store_true", help="mirror frames like the live window's flip option")
+    parser.add_argument("--regions", type=Path, help="JSON file with ROI / exclusion polygons per source")
+    parser.add_argument("--track", action="store_true", help="track blobs across frames and ignore short-lived ones")
+    parser.add_argument("--no-clips", action="store_true", help="do not record per-event clips")
+    parser.add_argument("--webhook", action="append", default=[], metavar="URL", help="POST event start/end notifications here (repeatable)")
+    parser.add_argument("--adaptive", action="store_true", help="lower detection scale/rate under load, as a live session does")
+    parser.add_argument("--stats-interval", type=float, default=10.0, help="seconds between fps/latency logs")
+    parser.add_argument("--max-frames", type=int, help="stop after this many frames")
+    args = parser.parse_args(argv)
+
+    cfg = AppConfig()
+    if args.output_dir:
+        cfg.output_dir = args.output_dir.expanduser()
+    cfg.tracking_enabled = cfg.tracking_enabled or args.track
+    cfg.record_live_clips = cfg.record_live_clips and not args.no_clips
+    cfg.webhook_urls = cfg.webhook_urls + args.webhook
+    if args.regions:
+        cfg.regions = loadRegions(args.regions)
+
+    motionCfg = LiveMotionConfig(
+        diff_threshold=args.threshold,
+        min_contour_area=args.min_area,
+        blur_ksize=args.blur,
+        morph_iters=args.morph_iters,
+        alpha=args.alpha,
+        warmup_frames=args.warmup,
+    )
+
+    try:
+        res = replayFile(
+            args.video,
+            cfg,
+            motionCfg,
+            throttle=args.throttle,
+            fps=args.fps,
+            flipHorizontal=args.flip,
+            maxFrames=args.max_frames,
+            logFn=printLog,
+            statsIntervalS=args.stats_interval,
+            adaptive=args.adaptive,
+        )
+    except RuntimeError as e:
+        printLog(f"ERROR: {e}")
+        return 1
+
+    printLog(
+        f"Replayed {res.frames} frames in {res.seconds:.2f}s | {res.fps:.1f} fps "
+        f"({res.realtimeFactor:.1f}x realtime at {res.videoFps:.2f} fps) | events={res.eventCount}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
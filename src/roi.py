@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+Point = Tuple[int, int]
+Polygon = List[Point]
+
+
+@dataclass
+class RegionConfig:
+    roi: List[Polygon] = field(default_factory=list)       # empty = whole frame
+    exclude: List[Polygon] = field(default_factory=list)   # never reports motion
+
+
+class RegionMask:
+
+    # A RegionConfig resolved for one frame size: detection crops every frame to `rect`
+    # (the bounding rectangle of the ROI polygons) before any preprocessing and ANDs the
+    # binary motion mask with `mask`; boxes are then shifted back by `offset`.
+
+    def __init__(self, region: RegionConfig, frameW: int, frameH: int):
+        self.region = region
+        self.frameSize = (int(frameW), int(frameH))
+
+        if region.roi:
+            pts = np.concatenate([np.asarray(p, dtype=np.int32).reshape(-1, 2) for p in region.roi])
+            x0 = int(np.clip(pts[:, 0].min(), 0, frameW - 1))
+            y0 = int(np.clip(pts[:, 1].min(), 0, frameH - 1))
+            x1 = int(np.clip(pts[:, 0].max() + 1, x0 + 1, frameW))
+            y1 = int(np.clip(pts[:, 1].max() + 1, y0 + 1, frameH))
+        else:
+            x0, y0, x1, y1 = 0, 0, frameW, frameH
+        self.rect = (x0, y0, x1, y1)
+        self.offset = (x0, y0)
+
+        mask = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+        shift = np.array([x0, y0], dtype=np.int32)
+        if region.roi:
+            cv2.fillPoly(mask, [np.asarray(p, dtype=np.int32).reshape(-1, 2) - shift for p in region.roi], 255)
+        else:
+            mask[:] = 255
+        if region.exclude:
+            cv2.fillPoly(mask, [np.asarray(p, dtype=np.int32).reshape(-1, 2) - shift for p in region.exclude], 0)
+
+        # A plain rectangle needs no per-frame masking, only the crop
+        self.mask: Optional[np.ndarray] = None if cv2.countNonZero(mask) == mask.size else mask
+
+    @property
+    def isFullFrame(self) -> bool:
+        return self.mask is None and self.rect == (0, 0) + self.frameSize
+
+    @property
+    def areaFraction(self) -> float:
+        x0, y0, x1, y1 = self.rect
+        return ((x1 - x0) * (y1 - y0)) / float(self.frameSize[0] * self.frameSize[1])
+
+    def crop(self, frame: np.ndarray) -> np.ndarray:
+        x0, y0, x1, y1 = self.rect
+        return frame[y0:y1, x0:x1]
+
+    def applyMask(self, binary: np.ndarray) -> np.ndarray:
+        if self.mask is not None:
+            cv2.bitwise_and(binary, self.mask, dst=binary)
+        return binary
+
+    def toFrame(self, boxes):
+        ox, oy = self.offset
+        if ox == 0 and oy == 0:
+            return boxes
+        return [(x + ox, y + oy, w, h) for (x, y, w, h) in boxes]
+
+
+def regionFor(cfg, sourceName: str) -> Optional[RegionConfig]:
+    # Exact source name first, then the "*" default
+    regions = getattr(cfg, "regions", None) or {}
+    return regions.get(sourceName) or regions.get("*")
+
+
+def resolveRegion(region: Optional[RegionConfig], frameW: int, frameH: int) -> Optional[RegionMask]:
+    if region is None or (not region.roi and not region.exclude):
+        return None
+    rm = RegionMask(region, frameW, frameH)
+    return None if rm.isFullFrame else rm
+
+
+def loadRegions(path: Path) -> Dict[str, RegionConfig]:
+    """
+    JSON of the form {"camera 0": {"roi": [[[x, y], ...]], "exclude": [[[x, y], ...]]}, "*": {...}}
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    out = {}
+    for name, spec in raw.items():
+        out[name] = RegionConfig(
+            roi=[[tuple(pt) for pt in poly] for poly in spec.get("roi", [])],
+            exclude=[[tuple(pt) for pt in poly] for poly in spec.get("exclude", [])],
+        )
+    return out
@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import itertools
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List
+
+import cv2
+
+from config import AppConfig, SENSITIVITY_PRESETS
+from events import EventBuilder, eventDurationS
+from motion import blurKernelSize, detectMotionFromDiff, frameDiff
+from roi import regionFor, resolveRegion
+from video_source import openSource
+
+
+@dataclass
+class SweepConfig:
+    name: str
+    diff_threshold: int = 25
+    min_contour_area: int = 800
+    blur_kernel: int = 5
+    erode_iters: int = 1
+    dilate_iters: int = 2
+
+
+@dataclass
+class SweepResult:
+    config: SweepConfig
+    eventCount: int = 0
+    totalEventS: float = 0.0
+    detectS: float = 0.0                # time spent in this configuration's detection only
+    baseS: float = 0.0                  # decode + shared preprocessing, paid once for all configurations
+    frames: int = 0
+    builder: EventBuilder = field(default=None, repr=False)
+
+    @property
+    def detectFps(self) -> float:
+        return self.frames / self.detectS if self.detectS > 0 else 0.0
+
+    @property
+    def fps(self) -> float:
+        # End to end, as if this configuration had been run on its own
+        totalS = self.baseS + self.detectS
+        return self.frames / totalS if totalS > 0 else 0.0
+
+
+def presetConfigs(cfg: AppConfig) -> List[SweepConfig]:
+    # The GUI presets, with the remaining settings taken from cfg
+    return [
+        SweepConfig(name, threshold, minArea, cfg.blur_kernel, cfg.erode_iters, cfg.dilate_iters)
+        for name, (threshold, minArea) in SENSITIVITY_PRESETS.items()
+    ]
+
+
+def gridConfigs(thresholds, minAreas, blurKernels, erodeIters, dilateIters) -> List[SweepConfig]:
+    out = []
+    for t, a, b, e, d in itertools.product(thresholds, minAreas, blurKernels, erodeIters, dilateIters):
+        out.append(SweepConfig(f"t{t}_a{a}_b{b}_e{e}_d{d}", t, a, b, e, d))
+    return out
+
+
+def sweepVideo(inputPath: Path, configs: List[SweepConfig], cfg: AppConfig, logFn=None) -> List[SweepResult]:
+    """
+    Decodes the video once and runs every configuration on each frame, each with its own
+    EventBuilder. Grayscale conversion and the blurred frame difference are computed once
+    per frame (once per distinct blur kernel) and shared by all configurations.
+    """
+    if not configs:
+        raise ValueError("No sweep configurations given")
+
+    source = openSource(inputPath, prefetch=cfg.prefetch_frames)
+    meta = source.meta
+
+    ok, prev = source.read()
+    if not ok:
+        source.release()
+        raise RuntimeError("Could not read first frame.")
+    # Crop to the ROI rectangle before the shared preprocessing
+    region = resolveRegion(regionFor(cfg, inputPath.name), prev.shape[1], prev.shape[0])
+    if region is not None:
+        prev = region.crop(prev)
+    prevGray = cv2.cvtColor(prev, cv2.COLOR_BGR2GRAY)
+
+    results = [
+        SweepResult(c, builder=EventBuilder(cfg.pre_roll_frames, cfg.post_roll_frames, cfg.min_event_frames))
+        for c in configs
+    ]
+    kernels = sorted({blurKernelSize(c.blur_kernel) for c in configs})
+
+    if logFn:
+        logFn(f"Sweep: {inputPath.name} | {meta.width}x{meta.height} | {len(configs)} configurations | blur kernels {kernels}")
+
+    frameIdx = 0
+    sharedS = 0.0
+    t0 = time.perf_counter()
+    while True:
+        ok, curr = source.read()
+        if not ok:
+            break
+        frameIdx += 1
+
+        ts = time.perf_counter()
+        if region is not None:
+            curr = region.crop(curr)
+        currGray = cv2.cvtColor(curr, cv2.COLOR_BGR2GRAY)
+        diffs: Dict[int, object] = {k: frameDiff(prevGray, currGray, k) for k in kernels}
+        sharedS += time.perf_counter() - ts
+
+        for r in results:
+            c = r.config
+            ts = time.perf_counter()
+            res = detectMotionFromDiff(
+                diffs[blurKernelSize(c.blur_kernel)],
+                diffThreshold=c.diff_threshold,
+                minContourArea=c.min_contour_area,
+                erodeIters=c.erode_iters,
+                dilateIters=c.dilate_iters,
+                region=region,
+            )
+            r.builder.update(frameIdx, res.motion, res.boxes)
+            r.detectS += time.perf_counter() - ts
+            r.frames += 1
+
+        prevGray = currGray
+
+    totalS = time.perf_counter() - t0
+    source.release()
+    baseS = max(0.0, totalS - sum(r.detectS for r in results))
+
+    for r in results:
+        r.builder.finalize(frameIdx)
+        r.eventCount = len(r.builder.events)
+        r.totalEventS = sum(eventDurationS(ev, meta.fps) for ev in r.builder.events)
+        r.baseS = baseS
+
+    if logFn:
+        logFn(f"Sweep done: {frameIdx} frames in {totalS:.2f}s ({frameIdx / max(totalS, 1e-9):.1f} fps overall, shared preprocessing {sharedS:.2f}s)")
+
+    return results
+
+
+SWEEP_CSV_HEADER = [
+    "name", "diff_threshold", "min_contour_area", "blur_kernel", "erode_iters", "dilate_iters",
+    "events", "total_event_s", "fps", "detect_fps",
+]
+
+
+def writeSweepCsv(path: Path, results: List[SweepResult]):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(SWEEP_CSV_HEADER)
+        for r in results:
+            c = r.config
+            w.writerow([c.name, c.diff_threshold, c.min_contour_area, c.blur_kernel, c.erode_iters, c.dilate_iters,
+                        r.eventCount, f"{r.totalEventS:.3f}", f"{r.fps:.1f}", f"{r.detectFps:.1f}"])
+
+
+def formatSweepTable(results: List[SweepResult]) -> str:
+    lines = [f"{'configuration':<24} {'thr':>4} {'area':>6} {'blur':>4} {'er':>3} {'dil':>3} {'events':>6} {'event s':>8} {'fps':>8} {'det fps':>8}"]
+    for r in results:
+        c = r.config
+        lines.append(
+            f"{c.name:<24} {c.diff_threshold:>4} {c.min_contour_area:>6} {c.blur_kernel:>4} {c.erode_iters:>3} {c.dilate_iters:>3} "
+            f"{r.eventCount:>6} {r.totalEventS:>8.2f} {r.fps:>8.1f} {r.detectFps:>8.1f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run several detector configurations over one decode of a video.")
+    parser.add_argument("video", type=Path)
+    parser.add_argument("--thresholds", type=int, nargs="+", help="diff_threshold values (grid mode)")
+    parser.add_argument("--min-areas", type=int, nargs="+", help="min_contour_area values (grid mode)")
+    parser.add_argument("--blur", type=int, nargs="+", help="blur_kernel values (grid mode)")
+    parser.add_argument("--erode", type=int, nargs="+", help="erode_iters values (grid mode)")
+    parser.add_argument("--dilate", type=int, nargs="+", help="dilate_iters values (grid mode)")
+    parser.add_argument("--output-dir", type=Path, help="override the output folder")
+    args = parser.parse_args(argv)
+
+    cfg = AppConfig()
+    if args.output_dir:
+        cfg.output_dir = args.output_dir.expanduser()
+
+    if any(v is not None for v in (args.thresholds, args.min_areas, args.blur, args.erode, args.dilate)):
+        configs = gridConfigs(
+            args.thresholds or [cfg.diff_threshold],
+            args.min_areas or [cfg.min_contour_area],
+            args.blur or [cfg.blur_kernel],
+            args.erode or [cfg.erode_iters],
+            args.dilate or [cfg.dilate_iters],
+        )
+    else:
+        configs = presetConfigs(cfg)
+
+    results = sweepVideo(args.video, configs, cfg, logFn=print)
+    print(formatSweepTable(results))
+
+    cfg.output_dir.mkdir(parents=True, exist_ok=True)
+    csvPath = cfg.output_dir / cfg.sweep_csv_name
+    writeSweepCsv(csvPath, results)
+    print(f"Saved sweep CSV: {csvPath}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
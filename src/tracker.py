@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+Box = Tuple[int, int, int, int]
+
+
+@dataclass
+class Track:
+    id: int
+    bbox: Box
+    firstIdx: int
+    lastIdx: int
+    hits: int = 1
+    misses: int = 0                     # consecutive frames without a match
+    path: List[Tuple[int, int, int]] = field(default_factory=list)  # (frameIdx, cx, cy)
+
+    @property
+    def lifetime(self) -> int:
+        return self.lastIdx - self.firstIdx + 1
+
+    @property
+    def centroid(self) -> Tuple[float, float]:
+        x, y, w, h = self.bbox
+        return x + w / 2.0, y + h / 2.0
+
+
+def _iou(a: Box, b: Box) -> float:
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    iw = min(ax + aw, bx + bw) - max(ax, bx)
+    ih = min(ay + ah, by + bh) - max(ay, by)
+    if iw <= 0 or ih <= 0:
+        return 0.0
+    inter = iw * ih
+    return inter / float(aw * ah + bw * bh - inter)
+
+
+class _GridIndex:
+
+    # Uniform grid over track boxes, so each detection is only compared with nearby tracks.
+
+    def __init__(self, cellSize: int):
+        self.cellSize = max(1, int(cellSize))
+        self._cells: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+
+    def _cellRange(self, box: Box, pad: int):
+        x, y, w, h = box
+        c = self.cellSize
+        return (
+            range((x - pad) // c, (x + w + pad) // c + 1),
+            range((y - pad) // c, (y + h + pad) // c + 1),
+        )
+
+    def insert(self, key: int, box: Box, pad: int = 0):
+        xs, ys = self._cellRange(box, pad)
+        for cx in xs:
+            for cy in ys:
+                self._cells[(cx, cy)].append(key)
+
+    def query(self, box: Box) -> set:
+        xs, ys = self._cellRange(box, 0)
+        out = set()
+        for cx in xs:
+            for cy in ys:
+                out.update(self._cells.get((cx, cy), ()))
+        return out
+
+
+class Tracker:
+
+    # Associates per-frame motion boxes into tracks by IoU, falling back to centroid distance.
+    # Tracks become confirmed after `minHits` matches; only confirmed tracks are reported, so
+    # flicker that never persists does not reach the EventBuilder.
+
+    def __init__(
+        self,
+        iouThreshold: float = 0.2,
+        maxDistance: float = 80.0,
+        maxMisses: int = 5,
+        minHits: int = 3,
+        cellSize: Optional[int] = None,
+        maxPathLen: int = 300,
+    ):
+        self.iouThreshold = iouThreshold
+        self.maxDistance = maxDistance
+        self.maxMisses = maxMisses
+        self.minHits = minHits
+        self.cellSize = int(cellSize or max(16, 2 * maxDistance))
+        self.maxPathLen = maxPathLen
+
+        self.tracks: List[Track] = []
+        self._nextId = 1
+
+    def reset(self):
+        self.tracks = []
+        self._nextId = 1
+
+    def update(self, frameIdx: int, boxes: List[Box]) -> List[Track]:
+        """
+        Returns the confirmed tracks matched on this frame.
+        """
+        grid = _GridIndex(self.cellSize)
+        pad = int(self.maxDistance)
+        for i, t in enumerate(self.tracks):
+            grid.insert(i, t.bbox, pad)
+
+        # Candidate pairs (score, trackIdx, boxIdx); IoU matches always outrank distance matches
+        pairs = []
+        maxD2 = self.maxDistance * self.maxDistance
+        for j, b in enumerate(boxes):
+            bx, by, bw, bh = b
+            bcx, bcy = bx + bw / 2.0, by + bh / 2.0
+            for i in grid.query(b):
+                t = self.tracks[i]
+                iou = _iou(t.bbox, b)
+                if iou >= self.iouThreshold:
+                    pairs.append((1.0 + iou, i, j))
+                    continue
+                tcx, tcy = t.centroid
+                d2 = (tcx - bcx) ** 2 + (tcy - bcy) ** 2
+                if d2 <= maxD2:
+                    pairs.append((1.0 - d2 / maxD2, i, j))
+
+        pairs.sort(reverse=True)
+        usedTracks = set()
+        usedBoxes = set()
+        for _, i, j in pairs:
+            if i in usedTracks or j in usedBoxes:
+                continue
+            usedTracks.add(i)
+            usedBoxes.add(j)
+            t = self.tracks[i]
+            t.bbox = tuple(boxes[j])
+            t.lastIdx = frameIdx
+            t.hits += 1
+            t.misses = 0
+            self._appendPath(t, frameIdx)
+
+        kept = []
+        for i, t in enumerate(self.tracks):
+            if i not in usedTracks:
+                t.misses += 1
+                if t.misses > self.maxMisses:
+                    continue
+            kept.append(t)
+
+        for j, b in enumerate(boxes):
+            if j in usedBoxes:
+                continue
+            t = Track(id=self._nextId, bbox=tuple(b), firstIdx=frameIdx, lastIdx=frameIdx)
+            self._appendPath(t, frameIdx)
+            kept.append(t)
+            self._nextId += 1
+
+        self.tracks = kept
+        return [t for t in self.tracks if t.lastIdx == frameIdx and t.hits >= self.minHits]
+
+    def _appendPath(self, t: Track, frameIdx: int):
+        cx, cy = t.centroid
+        t.path.append((frameIdx, int(cx), int(cy)))
+        if len(t.path) > self.maxPathLen:
+            del t.path[0]
+
+
+def makeTracker(cfg) -> Optional[Tracker]:
+    if not cfg.tracking_enabled:
+        return None
+    return Tracker(
+        iouThreshold=cfg.track_iou_threshold,
+        maxDistance=cfg.track_max_distance,
+        maxMisses=cfg.track_max_misses,
+        minHits=cfg.track_min_hits,
+    )
+
+
+def applyTracker(tracker: Optional[Tracker], frameIdx: int, motion: bool, boxes):
+    """
+    Returns (motion, boxes, trackBoxes) for EventBuilder.update. Without a tracker the
+    detections pass through unchanged and trackBoxes is None.
+    """
+    if tracker is None:
+        return motion, boxes, None
+    tracks = tracker.update(frameIdx, boxes)
+    trackBoxes = {t.id: t.bbox for t in tracks}
+    return len(tracks) > 0, list(trackBoxes.values()), trackBoxes
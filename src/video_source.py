@@ -0,0 +1,365 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+import queue
+import sys
+import threading
+
+import cv2
+import numpy as np
+
+from video_io import VideoMeta
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png")
+STREAM_PREFIXES = ("rtsp://", "rtmp://", "http://", "https://", "udp://", "tcp://")
+CAMERA_PREFIX = "camera:"
+
+
+class VideoSource:
+
+    # Common interface for everything that produces BGR frames.
+    # read() returns (ok, frame) like cv2.VideoCapture. ok=False with `finished` set means
+    # the source is done; without it (prefetch timeout) the caller may simply try again.
+    # read(image=buf) hands over a frame buffer the caller no longer needs: it may be
+    # decoded into and returned, or kept for a later frame, so always use the returned array.
+
+    isLive = False
+
+    def __init__(self):
+        self.meta = VideoMeta(fps=30.0, width=0, height=0, frameCount=0)
+        self.finished = False
+
+    def open(self) -> VideoMeta:
+        raise NotImplementedError
+
+    def read(self, image: Optional[np.ndarray] = None) -> Tuple[bool, Optional[np.ndarray]]:
+        raise NotImplementedError
+
+    def skip(self, n: int) -> None:
+        for _ in range(n):
+            ok, _ = self.read()
+            if not ok:
+                break
+
+    def interrupt(self) -> None:
+        # Wake up any blocking wait (e.g. reconnect backoff) so release() can follow promptly
+        pass
+
+    def release(self) -> None:
+        pass
+
+    def describe(self) -> str:
+        return self.__class__.__name__
+
+
+class _CaptureSource(VideoSource):
+
+    # Shared cv2.VideoCapture handling, with reconnect + exponential backoff for live inputs.
+
+    def __init__(self, reconnect: bool = False, maxReconnects: Optional[int] = None,
+                 backoffS: float = 0.5, maxBackoffS: float = 8.0, logFn=None):
+        super().__init__()
+        self.reconnect = reconnect
+        self.maxReconnects = maxReconnects
+        self.backoffS = backoffS
+        self.maxBackoffS = maxBackoffS
+        self.logFn = logFn
+        self.cap: Optional[cv2.VideoCapture] = None
+        self._closed = threading.Event()
+
+    def _makeCapture(self) -> cv2.VideoCapture:
+        raise NotImplementedError
+
+    def writeLog(self, msg: str):
+        if self.logFn:
+            self.logFn(msg)
+
+    def open(self) -> VideoMeta:
+        cap = self._makeCapture()
+        if not cap.isOpened():
+            cap.release()
+            raise RuntimeError(f"Could not open video: {self.describe()}")
+        self.cap = cap
+        self._closed.clear()
+        self.finished = False
+
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH) or 0)
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT) or 0)
+        frameCount = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        self.meta = VideoMeta(fps=fps, width=width, height=height, frameCount=frameCount)
+        return self.meta
+
+    def read(self, image: Optional[np.ndarray] = None) -> Tuple[bool, Optional[np.ndarray]]:
+        if self.cap is None:
+            return False, None
+        ok, frame = self.cap.read(image) if image is not None else self.cap.read()
+        if ok and frame is not None:
+            return True, frame
+        if self.reconnect and self._reconnect():
+            ok, frame = self.cap.read()
+            if ok and frame is not None:
+                return True, frame
+        self.finished = True
+        return False, None
+
+    def skip(self, n: int) -> None:
+        if self.cap is None:
+            return
+        for _ in range(n):
+            if not self.cap.grab():
+                break
+
+    def _reconnect(self) -> bool:
+        delay = self.backoffS
+        attempt = 0
+        while not self._closed.is_set():
+            if self.maxReconnects is not None and attempt >= self.maxReconnects:
+                self.writeLog(f"Giving up on {self.describe()} after {attempt} reconnect attempts.")
+                return False
+            attempt += 1
+            self.writeLog(f"{self.describe()} lost; reconnecting in {delay:.1f}s (attempt {attempt}).")
+            if self._closed.wait(delay):
+                return False
+            if self.cap is not None:
+                self.cap.release()
+            cap = self._makeCapture()
+            if cap.isOpened():
+                self.cap = cap
+                self.writeLog(f"Reconnected to {self.describe()}.")
+                return True
+            cap.release()
+            delay = min(self.maxBackoffS, delay * 2)
+        return False
+
+    def interrupt(self) -> None:
+        self._closed.set()
+
+    def release(self) -> None:
+        self._closed.set()
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+
+class FileSource(_CaptureSource):
+    def __init__(self, path: Union[str, Path]):
+        super().__init__(reconnect=False)
+        self.path = Path(path)
+
+    def _makeCapture(self) -> cv2.VideoCapture:
+        return cv2.VideoCapture(str(self.path))
+
+    def describe(self) -> str:
+        return str(self.path)
+
+
+class CameraSource(_CaptureSource):
+    isLive = True
+
+    def __init__(self, index: int = 0, **kwargs):
+        kwargs.setdefault("reconnect", True)
+        super().__init__(**kwargs)
+        self.index = int(index)
+
+    def _makeCapture(self) -> cv2.VideoCapture:
+        # macOS: prefer AVFoundation backend
+        if sys.platform == "darwin":
+            return cv2.VideoCapture(self.index, cv2.CAP_AVFOUNDATION)
+        return cv2.VideoCapture(self.index)
+
+    def describe(self) -> str:
+        return f"camera {self.index}"
+
+
+class StreamSource(_CaptureSource):
+    isLive = True
+
+    def __init__(self, url: str, **kwargs):
+        kwargs.setdefault("reconnect", True)
+        super().__init__(**kwargs)
+        self.url = url
+
+    def _makeCapture(self) -> cv2.VideoCapture:
+        return cv2.VideoCapture(self.url)
+
+    def describe(self) -> str:
+        return self.url
+
+
+class ImageSequenceSource(VideoSource):
+
+    # Directory of JPEG/PNG frames, played back in file-name order.
+
+    def __init__(self, directory: Union[str, Path], fps: float = 30.0):
+        super().__init__()
+        self.directory = Path(directory)
+        self.fps = float(fps)
+        self._paths: List[Path] = []
+        self._pos = 0
+
+    def open(self) -> VideoMeta:
+        self._paths = sorted(p for p in self.directory.iterdir() if p.suffix.lower() in IMAGE_EXTS)
+        if not self._paths:
+            raise RuntimeError(f"No JPEG/PNG frames found in: {self.directory}")
+        first = cv2.imread(str(self._paths[0]), cv2.IMREAD_COLOR)
+        if first is None:
+            raise RuntimeError(f"Could not read image: {self._paths[0]}")
+        h, w = first.shape[:2]
+        self._pos = 0
+        self.finished = False
+        self.meta = VideoMeta(fps=self.fps, width=w, height=h, frameCount=len(self._paths))
+        return self.meta
+
+    def read(self, image: Optional[np.ndarray] = None) -> Tuple[bool, Optional[np.ndarray]]:
+        while self._pos < len(self._paths):
+            path = self._paths[self._pos]
+            self._pos += 1
+            frame = cv2.imread(str(path), cv2.IMREAD_COLOR)
+            if frame is None:
+                continue
+            if frame.shape[1] != self.meta.width or frame.shape[0] != self.meta.height:
+                frame = cv2.resize(frame, (self.meta.width, self.meta.height))
+            if image is not None and image.shape == frame.shape:
+                np.copyto(image, frame)
+                return True, image
+            return True, frame
+        self.finished = True
+        return False, None
+
+    def skip(self, n: int) -> None:
+        self._pos = min(len(self._paths), self._pos + n)
+
+    def describe(self) -> str:
+        return str(self.directory)
+
+
+class PrefetchSource(VideoSource):
+
+    # Decodes on a background thread into a bounded queue.
+    # Live inputs drop the oldest queued frame when full (freshness over completeness);
+    # files block the reader instead, so no frame is lost.
+    # Buffers passed to read(image=...) (and dropped live frames) go into a free pool that
+    # the decoder reads into, so a caller that hands its buffers back allocates nothing per frame.
+
+    def __init__(self, inner: VideoSource, maxFrames: int = 4, readTimeoutS: Optional[float] = None):
+        super().__init__()
+        self.readTimeoutS = readTimeoutS
+        self.inner = inner
+        self.isLive = inner.isLive
+        self.maxFrames = max(1, int(maxFrames))
+        self.droppedFrames = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=self.maxFrames)
+        self._free: queue.SimpleQueue = queue.SimpleQueue()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def open(self) -> VideoMeta:
+        self.meta = self.inner.open()
+        self._stop.clear()
+        self.finished = False
+        self._thread = threading.Thread(target=self._readerLoop, name="VideoPrefetch", daemon=True)
+        self._thread.start()
+        return self.meta
+
+    def _readerLoop(self):
+        while not self._stop.is_set():
+            try:
+                buf = self._free.get_nowait()
+            except queue.Empty:
+                buf = None
+            ok, frame = self.inner.read(buf)
+            item = frame if ok else None
+            if self.isLive and item is not None:
+                while True:
+                    try:
+                        self._queue.put_nowait(item)
+                        break
+                    except queue.Full:
+                        try:
+                            self._recycle(self._queue.get_nowait())
+                            self.droppedFrames += 1
+                        except queue.Empty:
+                            pass
+            else:
+                while not self._stop.is_set():
+                    try:
+                        self._queue.put(item, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+            if item is None:
+                return
+
+    def read(self, image: Optional[np.ndarray] = None) -> Tuple[bool, Optional[np.ndarray]]:
+        if image is not None:
+            self._recycle(image)
+        if self.finished:
+            return False, None
+        try:
+            frame = self._queue.get(timeout=self.readTimeoutS)
+        except queue.Empty:
+            # Stalled (e.g. reconnecting) but not finished
+            return False, None
+        if frame is None:
+            self.finished = True
+            return False, None
+        return True, frame
+
+    def _recycle(self, buf: Optional[np.ndarray]):
+        # Enough spares for a full queue plus the frame being decoded; extras are freed
+        if buf is not None and self._free.qsize() < self.maxFrames + 1:
+            self._free.put(buf)
+
+    def release(self) -> None:
+        self._stop.set()
+        self.inner.interrupt()
+        # Unblock a reader waiting on a full queue
+        try:
+            while True:
+                self._queue.get_nowait()
+        except queue.Empty:
+            pass
+        # Release only after the reader is gone so the capture is never freed mid-read
+        if self._thread is not None:
+            self._thread.join(5.0)
+            self._thread = None
+        self.inner.release()
+
+    def describe(self) -> str:
+        return self.inner.describe()
+
+
+def makeSource(spec: Union[str, int, Path], prefetch: int = 0, fps: float = 30.0,
+               readTimeoutS: Optional[float] = None, logFn=None) -> VideoSource:
+    """
+    spec: camera index (int, or "camera:N"), stream URL, directory of frames or a video file path.
+    A string of digits is a file name, not a camera.
+    prefetch > 0 wraps the source in a PrefetchSource with that many frames of buffering;
+    readTimeoutS bounds how long read() waits on it.
+    """
+    if isinstance(spec, str) and spec.lower().startswith(CAMERA_PREFIX):
+        index = spec[len(CAMERA_PREFIX):]
+        if not index.isdigit():
+            raise RuntimeError(f"Camera source must look like camera:0, got: {spec}")
+        spec = int(index)
+    if isinstance(spec, int):
+        src: VideoSource = CameraSource(spec, logFn=logFn)
+    elif isinstance(spec, str) and spec.lower().startswith(STREAM_PREFIXES):
+        src = StreamSource(spec, logFn=logFn)
+    elif Path(spec).is_dir():
+        src = ImageSequenceSource(spec, fps=fps)
+    else:
+        src = FileSource(spec)
+
+    if prefetch > 0:
+        src = PrefetchSource(src, maxFrames=prefetch, readTimeoutS=readTimeoutS)
+    return src
+
+
+def openSource(spec: Union[str, int, Path], prefetch: int = 0, fps: float = 30.0,
+               readTimeoutS: Optional[float] = None, logFn=None) -> VideoSource:
+    src = makeSource(spec, prefetch=prefetch, fps=fps, readTimeoutS=readTimeoutS, logFn=logFn)
+    src.open()
+    return src